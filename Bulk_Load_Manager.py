@@ -0,0 +1,135 @@
+from sqlalchemy import create_engine
+from concurrent.futures import ThreadPoolExecutor
+
+from shared import camel_to_snake
+
+staging_suffix = '__staging'
+
+
+class Bulk_Load_Manager:
+    def __init__(self, db_connection_url, schema, dispatch_tables, primary_keys=False, foreign_keys=False, workers=4, ancestor_ids=False):
+        # one connection per worker, the indexes are built in parallel
+        self.postgresql_db = create_engine(db_connection_url, pool_size=workers)
+        self.schema = schema
+        self.dispatch_tables = dispatch_tables
+        # primary keys on 'id' are optional, because they fail if the same element is part of multiple files
+        self.primary_keys = primary_keys
+        # foreign keys need primary keys on the parent tables
+        self.foreign_keys = foreign_keys and primary_keys
+        self.workers = workers
+        # gin indexes on the column ancestor_ids, only useful if the column is filled
+        self.ancestor_ids = ancestor_ids
+        self.table_names = [camel_to_snake(table_name) for table_name in schema.keys()]
+
+    def prepare(self):
+        # the files are loaded into unlogged staging tables without any index, which is a lot faster than loading into the indexed tables
+        with self.postgresql_db.begin() as connection:
+            # the staging tables are created without partitions, the swap would remove the partitioning
+            partitioned_tables = [row[0] for row in connection.execute('SELECT c.relname FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid')]
+            if any(table_name in partitioned_tables for table_name in self.table_names):
+                raise Exception(f'bulk load is not supported for partitioned tables: {", ".join(partitioned_tables)}')
+
+            for table_name in self.table_names:
+                connection.execute(f'DROP TABLE IF EXISTS {table_name}{staging_suffix}')
+                connection.execute(f'CREATE UNLOGGED TABLE {table_name}{staging_suffix} (LIKE {table_name} INCLUDING DEFAULTS)')
+
+
+    def finish(self):
+        # the staging tables get logged, indexed and swapped with the existing tables
+        self.execute_in_parallel([f'ALTER TABLE {table_name}{staging_suffix} SET LOGGED' for table_name in self.table_names])
+        self.execute_in_parallel([statement for table_name in self.table_names for statement in self.get_index_statements(table_name)])
+
+        parent_tables = self.get_parent_tables() if self.foreign_keys else {}
+
+        with self.postgresql_db.begin() as connection:
+            if self.primary_keys:
+                # the unique indexes already exist, so adding the primary keys doesn't need to scan the tables again
+                for table_name in self.table_names:
+                    connection.execute(
+                        f'ALTER TABLE {table_name}{staging_suffix} ADD CONSTRAINT {table_name}{staging_suffix}_pkey PRIMARY KEY USING INDEX {table_name}{staging_suffix}_id_idx'
+                    )
+
+            for table_name, parent_table_name in parent_tables.items():
+                connection.execute(f'''
+                    ALTER TABLE {table_name}{staging_suffix} ADD CONSTRAINT {table_name}{staging_suffix}_parent_id_fkey
+                    FOREIGN KEY (parent_id) REFERENCES {parent_table_name}{staging_suffix} (id)
+                ''')
+
+        self.swap_tables(parent_tables)
+
+
+    def get_index_statements(self, table_name):
+        columns = [camel_to_snake(column_name) for column_name in self.schema_columns(table_name)]
+        staging_table_name = f'{table_name}{staging_suffix}'
+
+        if self.primary_keys:
+            statements = [f'CREATE UNIQUE INDEX {staging_table_name}_id_idx ON {staging_table_name} (id)']
+        else:
+            statements = [f'CREATE INDEX {staging_table_name}_id_idx ON {staging_table_name} (id)']
+
+        if 'parent_id' in columns:
+            statements.append(f'CREATE INDEX {staging_table_name}_parent_id_idx ON {staging_table_name} (parent_id)')
+        if 'geom' in columns:
+            statements.append(f'CREATE INDEX {staging_table_name}_geom_idx ON {staging_table_name} USING GIST (geom)')
+        if 'source_file' in columns:
+            statements.append(f'CREATE INDEX {staging_table_name}_source_file_idx ON {staging_table_name} (source_file)')
+        if 'version' in columns:
+            statements.append(f'CREATE INDEX {staging_table_name}_id_version_idx ON {staging_table_name} (id, version)')
+        if self.ancestor_ids and 'ancestor_ids' in columns:
+            statements.append(f'CREATE INDEX {staging_table_name}_ancestor_ids_idx ON {staging_table_name} USING GIN (ancestor_ids)')
+
+        return statements
+
+
+    def schema_columns(self, table_name):
+        for schema_table_name, columns in self.schema.items():
+            if camel_to_snake(schema_table_name) == table_name:
+                return columns.keys()
+        return []
+
+
+    def get_parent_tables(self):
+        # a foreign key can only be created if a table always has the same parent table
+        # example: 'Quay' is always part of 'StopPlace', but 'StopPlace' can be part of 'SiteFrame' or 'GroupOfStopPlaces'
+        parent_tables = {}
+
+        for table_name in self.schema.keys():
+            for _, _, child_node_id, _ in self.dispatch_tables[table_name].values():
+                for _, _, child_of_child_node_id, belongs_to_a_seperate_table in self.dispatch_tables.get(child_node_id, {}).values():
+                    if belongs_to_a_seperate_table and child_of_child_node_id in self.schema.keys():
+                        parent_tables.setdefault(camel_to_snake(child_of_child_node_id), set()).add(camel_to_snake(table_name))
+
+        return {table_name: parents.pop() for table_name, parents in parent_tables.items() if len(parents) == 1}
+
+
+    def swap_tables(self, parent_tables):
+        # all tables are swapped in one transaction, so the new data gets visible at once
+        with self.postgresql_db.begin() as connection:
+            for table_name in self.table_names:
+                connection.execute(f'ALTER TABLE {table_name} RENAME TO {table_name}__old')
+                connection.execute(f'ALTER TABLE {table_name}{staging_suffix} RENAME TO {table_name}')
+
+            # all old tables are dropped with one statement, so foreign keys between them don't matter
+            # the indexes of the old tables are dropped with them, so the indexes of the new tables can take their names
+            connection.execute(f'DROP TABLE {", ".join(f"{table_name}__old" for table_name in self.table_names)}')
+            # the manifest of the incremental mode describes the old tables
+            connection.execute('DROP TABLE IF EXISTS netex_file_manifest')
+
+            for table_name in self.table_names:
+                for index_name in ['id_idx', 'parent_id_idx', 'geom_idx', 'source_file_idx', 'id_version_idx', 'ancestor_ids_idx']:
+                    connection.execute(f'ALTER INDEX IF EXISTS {table_name}{staging_suffix}_{index_name} RENAME TO {table_name}_{index_name}')
+
+                if self.primary_keys:
+                    connection.execute(f'ALTER TABLE {table_name} RENAME CONSTRAINT {table_name}{staging_suffix}_pkey TO {table_name}_pkey')
+                if table_name in parent_tables:
+                    connection.execute(f'ALTER TABLE {table_name} RENAME CONSTRAINT {table_name}{staging_suffix}_parent_id_fkey TO {table_name}_parent_id_fkey')
+
+
+    def execute_in_parallel(self, statements):
+        def execute(statement):
+            with self.postgresql_db.begin() as connection:
+                connection.execute(statement)
+
+        with ThreadPoolExecutor(self.workers) as executor:
+            # list() raises the first exception of the statements
+            list(executor.map(execute, statements))
\ No newline at end of file
@@ -0,0 +1,53 @@
+from JSON_Encoder import JSON_Encoder
+
+# tables with millions of small rows per file, their rows are stored column by column instead of one dict per row
+column_store_table_names = [
+    'TimetabledPassingTime', 'StopPointInJourneyPattern', 'ServiceLinkInJourneyPattern', 'PointOnRoute', 'DayTypeAssignment'
+]
+
+
+class Column_Store:
+    def __init__(self, column_names):
+        # column name -> list with one value per row (None if the row has no value)
+        self.columns = {column_name: [] for column_name in column_names}
+        self.column_names_with_values = set()
+        self.row_count = 0
+        # every value is stored only once, because most values are repeated a lot
+        # example: all passing times of a service journey have the same 'parent_id' and most of them have the same 'attributes'
+        self.values = {}
+        self.json_encoder = JSON_Encoder()
+
+    def append(self, row):
+        # the values of the row are copied, changes of the row after the call don't change the stored values
+        for column_name in row.keys():
+            if column_name not in self.columns:
+                self.columns[column_name] = [None] * self.row_count
+
+        values = self.values
+        for column_name, column in self.columns.items():
+            value = row.get(column_name)
+
+            if value != None:
+                # dicts are stored as json text, which is also the value that is sent to the database
+                if isinstance(value, dict):
+                    value = self.json_encoder.encode(value)
+
+                # ids are unique, so storing them once wouldn't save any memory
+                # only texts are stored once, values of other types can be equal without being the same (True == 1 == Decimal('1.0'))
+                if type(value) is str and column_name != 'id':
+                    value = values.setdefault(value, value)
+
+                self.column_names_with_values.add(column_name)
+
+            column.append(value)
+
+        self.row_count += 1
+
+
+    def __len__(self):
+        return self.row_count
+
+
+    def get_values(self, column_names, start, end):
+        # returns the values of the rows from start to end as tuples in the order of column_names
+        return zip(*[self.columns[column_name][start:end] if column_name in self.columns else [None] * (min(end, self.row_count) - start) for column_name in column_names])
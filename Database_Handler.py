@@ -1,59 +1,316 @@
 from sqlalchemy import create_engine
 import shapely
-from shapely import wkt
-import pandas as pd
-import geopandas as gpd
-import math
+from shapely import wkb
+import contextlib
+import hashlib
+import io
 
+from Ingestion_Metrics import Ingestion_Metrics
+from shared import camel_to_snake
+from Column_Store import Column_Store
+from Output_Sink import Output_Sink
+from JSON_Encoder import JSON_Encoder
 
-class Database_Handler:
-    def __init__(self, db_connection_url):
-        self.postgresql_db = create_engine(db_connection_url)
 
-    def insert(self, table_name, table_rows):
+class Database_Handler(Output_Sink):
+    def __init__(self, db_connection_url, copy_size=100000, metrics=None, schema=None, commit_size=1, table_suffix=''):
+        self.postgresql_db = create_engine(db_connection_url, pool_pre_ping=True)
+        self.copy_size = copy_size
+        self.metrics = metrics if metrics != None else Ingestion_Metrics()
+        # encodes the dicts of the jsonb columns and the items of the ARRAY(JSONB) columns
+        self.json_encoder = JSON_Encoder()
+
+        # the connection is kept open for all files, the transaction gets committed after commit_size files
+        self.connection = None
+        self.commit_size = commit_size
+        self.uncommitted_file_count = 0
+        self.in_file_transaction = False
+
+        # the rows are copied into '<table name><table_suffix>', example: the staging tables of the bulk load ('__staging')
+        self.table_suffix = table_suffix
+
+        # tables that are partitioned by 'source_file' (see Final_Schema_Builder.create_tables_in_database), read from the database when they are needed
+        self.partitioned_tables = None
+        # (table name, source file) of the partitions that are known to exist
+        self.created_partitions = set()
+
+        # column names of every table in the order of the schema (without 'source_file', which is added separately)
+        self.table_columns = {}
+        if schema != None:
+            for table_name, columns in schema.items():
+                column_names = [camel_to_snake(column_name) for column_name in columns.keys()]
+                self.table_columns[camel_to_snake(table_name)] = [column_name for column_name in column_names if column_name != 'source_file']
+
+    def insert(self, table_name, table_rows, source_file=None, upsert=False):
         if len(table_rows) > 0:
-            if 'geom' in table_rows[0].keys():
-                table = gpd.GeoDataFrame(table_rows, geometry='geom')
+            column_names = self.get_column_names(table_name, table_rows)
+            # the columns of the table that get a value, source_file is added by copy_rows
+            copy_column_names = column_names + ['source_file'] if source_file != None else column_names
+
+            cursor = self.get_cursor()
+
+            if upsert:
+                # elements with an id should be replaced if the same version of the element already exists
+                # for this reason the rows are copied to a temporary table first and the existing rows get deleted before the rows get inserted
+                copy_table_name = f'{table_name}__upsert'
+                cursor.execute(f'CREATE TEMPORARY TABLE {copy_table_name} (LIKE {table_name} INCLUDING DEFAULTS) ON COMMIT DROP')
+            elif source_file != None and table_name in self.get_partitioned_tables():
+                # the rows are copied directly into the partition of the file, instead of being routed by the partitioned table
+                copy_table_name = self.create_partition(table_name, source_file)
             else:
-                table = pd.DataFrame(table_rows)
-            
-            # ensures that each row has the same column count
-            # if a row don't has a specific column value, it automatically sets the value to null
-            table = list(table.T.to_dict().values())
-            #table_values = [[value for value in row.values()] for row in table]
-            
-            column_names = table[0].keys()
-            query = f'INSERT INTO {table_name} ({{}}) VALUES '.format(','.join(column_names))
-            
-            # split table in chunks
-            table_chunks = [table[i:i + 1000] for i in range(0, len(table), 1000)]
-            for table_chunk in table_chunks:
-                table_values = []
-                
-                for row in table_chunk:
-                    row_values = []
-                    for value in row.values():
-                        row_values.append(self.value_to_string(value))
-
-                    table_values.append('(' + ','.join(row_values) + ')')
-
-                table_values = ','.join(table_values)
-
-                self.postgresql_db.engine.execute(query + table_values)
-
-    
-    def value_to_string(self, value):
-        if isinstance(value, dict):
-            return "'" + str(value).replace("'", '"').replace('None', '"NULL"') + "'::jsonb"
+                copy_table_name = f'{table_name}{self.table_suffix}'
+
+            upsert_table_name = table_name
+            if upsert and source_file != None and table_name in self.get_partitioned_tables():
+                # the rows are upserted in the partition of the file instead of the partitioned table
+                # like this the transaction of the file doesn't lock the other partitions, especially not the default partition (see create_partition)
+                upsert_table_name = self.create_partition(table_name, source_file)
+
+            size = self.copy_rows(cursor, copy_table_name, column_names, table_rows, source_file)
+            self.metrics.add_table_rows(table_name, len(table_rows), size)
+
+            if upsert:
+                with self.metrics.stage('upsert'):
+                    # one round trip for all statements
+                    cursor.execute(f'''
+                        DELETE FROM {upsert_table_name} USING {copy_table_name} WHERE {upsert_table_name}.id = {copy_table_name}.id AND {upsert_table_name}.version = {copy_table_name}.version;
+                        INSERT INTO {upsert_table_name} ({",".join(copy_column_names)}) SELECT {",".join(copy_column_names)} FROM {copy_table_name};
+                        DROP TABLE {copy_table_name};
+                    ''')
+
+            if not self.in_file_transaction:
+                self.commit()
+
+
+    def get_cursor(self):
+        if self.connection == None:
+            self.connection = self.postgresql_db.raw_connection()
+        return self.connection.cursor()
+
+
+    @contextlib.contextmanager
+    def file_transaction(self):
+        # all statements of a file are executed in a savepoint, so a failed file doesn't leave any rows behind
+        # multiple files share a transaction (see commit_size), so that the commit overhead is only paid once for all of them
+        cursor = self.get_cursor()
+        cursor.execute('SAVEPOINT netex_file')
+        self.in_file_transaction = True
+
+        try:
+            yield
+        except BaseException:
+            self.in_file_transaction = False
+            cursor.execute('ROLLBACK TO SAVEPOINT netex_file')
+            # the files before the failed file are complete and can be committed
+            self.commit()
+            raise
+
+        self.in_file_transaction = False
+        cursor.execute('RELEASE SAVEPOINT netex_file')
+
+        self.uncommitted_file_count += 1
+        if self.uncommitted_file_count >= self.commit_size:
+            self.commit()
+
+
+    def commit(self):
+        if self.connection != None:
+            with self.metrics.stage('commit'):
+                self.connection.commit()
+        self.uncommitted_file_count = 0
+
+
+    def close(self):
+        self.commit()
+        if self.connection != None:
+            self.connection.close()
+            self.connection = None
+
+
+    def get_column_names(self, table_name, table_rows):
+        # only the columns which have a value in at least one row are sent, in the order of the schema
+        # rows that don't have a value for one of these columns get null
+        if isinstance(table_rows, Column_Store):
+            column_names_with_values = table_rows.column_names_with_values
+        else:
+            column_names_with_values = set().union(*table_rows)
+
+        if table_name in self.table_columns:
+            return [column_name for column_name in self.table_columns[table_name] if column_name in column_names_with_values]
+        elif isinstance(table_rows, Column_Store):
+            return [column_name for column_name in table_rows.columns.keys() if column_name in column_names_with_values]
+        else:
+            return list(dict.fromkeys(column_name for row in table_rows for column_name in row.keys()))
+
+
+    def copy_rows(self, cursor, table_name, column_names, table_rows, source_file=None):
+        # column_names are the columns with values in table_rows
+        # the source file is the same for all rows, so it isn't part of the values of the rows, but added as last field to the text of every row
+        copy_column_names = column_names
+        row_end = '\n'
+        if source_file != None:
+            copy_column_names = column_names + ['source_file']
+            row_end = '\t' + self.escape_copy_text(source_file) + '\n'
+
+        query = f'COPY {table_name} ({",".join(copy_column_names)}) FROM STDIN'
+        value_to_copy_text = self.value_to_copy_text
+
+        # the rows are sent in the text format of the COPY command, in chunks so that the buffer doesn't get too big
+        # returns the size of the sent text
+        size = 0
+        for i in range(0, len(table_rows), self.copy_size):
+            with self.metrics.stage('encode'):
+                buffer = io.StringIO()
+                # the values of a column store are read column by column, without creating a dict per row
+                if isinstance(table_rows, Column_Store):
+                    rows_values = table_rows.get_values(column_names, i, i + self.copy_size)
+                else:
+                    rows_values = (map(row.get, column_names) for row in table_rows[i:i + self.copy_size])
+
+                for values in rows_values:
+                    buffer.write('\t'.join([value_to_copy_text(value) for value in values]))
+                    buffer.write(row_end)
+
+            size += buffer.tell()
+
+            buffer.seek(0)
+            with self.metrics.stage('copy'):
+                cursor.copy_expert(query, buffer)
+
+        return size
+
+
+    def get_partitioned_tables(self):
+        if self.partitioned_tables == None:
+            cursor = self.get_cursor()
+            cursor.execute('SELECT c.relname FROM pg_partitioned_table p JOIN pg_class c ON c.oid = p.partrelid')
+            self.partitioned_tables = set(row[0] for row in cursor.fetchall())
+        return self.partitioned_tables
+
+
+    def get_partition_name(self, table_name, source_file):
+        # file names can be longer than the allowed length of table names and can contain any character
+        return f'{table_name}__{hashlib.sha1(source_file.encode()).hexdigest()[:12]}'
+
+
+    def create_partitions(self, source_file, table_names):
+        # called before the file transaction of the file starts (see NeTEx_Ingestor.read_and_insert_file)
+        # with commit_size > 1 the transaction of the previous files is still open at this point, but it only holds locks on the partitions of these files
+        for table_name in table_names:
+            if table_name in self.get_partitioned_tables():
+                self.create_partition(table_name, source_file)
+
+
+    def create_partition(self, table_name, source_file):
+        # every file has its own partition, so the rows of a file can be replaced by truncating the partition
+        partition_name = self.get_partition_name(table_name, source_file)
+
+        if (table_name, source_file) not in self.created_partitions:
+            # the partition is created in its own short transaction, not in the transaction of the file
+            # 'CREATE TABLE ... PARTITION OF' would lock the partitioned table exclusively until the file is committed, so all other workers would wait for it
+            # 'ATTACH PARTITION' takes a SHARE UPDATE EXCLUSIVE lock on the partitioned table, which doesn't block the inserts of the other workers,
+            # but an ACCESS EXCLUSIVE lock on the default partition, for this reason the open transactions must not touch the default partition:
+            # the rows of a file are only copied, upserted and deleted in the partition of the file, never in the partitioned table
+            # a partition of a failed file stays empty, it's used again by the next attempt
+            with self.postgresql_db.begin() as connection:
+                connection.execute(f'CREATE TABLE IF NOT EXISTS {partition_name} (LIKE {table_name} INCLUDING DEFAULTS)')
+                is_attached = connection.execute('SELECT 1 FROM pg_inherits WHERE inhrelid = to_regclass(%s)', (partition_name,)).first() != None
+                if not is_attached:
+                    connection.execute(f'ALTER TABLE {table_name} ATTACH PARTITION {partition_name} FOR VALUES IN (%s)', (source_file,))
+            self.created_partitions.add((table_name, source_file))
+
+        return partition_name
+
+
+    def truncate_partition(self, table_name, source_file):
+        # the partition is truncated instead of detached and dropped
+        # TRUNCATE only locks the partition of the file, 'DETACH PARTITION' would lock the partitioned table exclusively until the file is committed
+        # like the deletion of the other tables, the truncation is part of the transaction of the file and rolled back if the file fails
+        partition_name = self.get_partition_name(table_name, source_file)
+        cursor = self.get_cursor()
+
+        cursor.execute('SELECT to_regclass(%s)', (partition_name,))
+        if cursor.fetchone()[0] != None:
+            # truncating the partition doesn't need to touch any row, unlike a DELETE
+            cursor.execute(f'TRUNCATE {partition_name}')
+
+
+    def create_manifest_table(self, table_names):
+        # the manifest contains the content hash of every ingested file, so unchanged files can be skipped
+        self.postgresql_db.engine.execute('''
+            CREATE TABLE IF NOT EXISTS netex_file_manifest (
+                source_file varchar PRIMARY KEY,
+                content_hash varchar NOT NULL,
+                ingested_at timestamptz NOT NULL DEFAULT now()
+            )
+        ''')
+
+        # without these indexes the deletion of the rows of a changed file and the upsert would need to scan the whole tables
+        for table_name in table_names:
+            self.postgresql_db.engine.execute(f'CREATE INDEX IF NOT EXISTS {table_name}_source_file_idx ON {table_name} (source_file)')
+            self.postgresql_db.engine.execute(f'CREATE INDEX IF NOT EXISTS {table_name}_id_version_idx ON {table_name} (id, version)')
+
+
+    def get_content_hash(self, source_file):
+        cursor = self.get_cursor()
+        cursor.execute('SELECT content_hash FROM netex_file_manifest WHERE source_file = %s', (source_file,))
+        row = cursor.fetchone()
+
+        if row == None:
+            return None
+        return row[0]
+
+
+    def delete_source_file_rows(self, source_file, table_names):
+        for table_name in table_names:
+            if table_name in self.get_partitioned_tables():
+                self.truncate_partition(table_name, source_file)
+
+        # one round trip for all other tables
+        self.get_cursor().execute(
+            ';'.join(
+                f'DELETE FROM {table_name} WHERE source_file = %(source_file)s'
+                for table_name in table_names if table_name not in self.get_partitioned_tables()
+            ),
+            {'source_file': source_file}
+        )
+
+
+    def update_manifest(self, source_file, content_hash):
+        self.get_cursor().execute('''
+            INSERT INTO netex_file_manifest (source_file, content_hash) VALUES (%s, %s)
+            ON CONFLICT (source_file) DO UPDATE SET content_hash = EXCLUDED.content_hash, ingested_at = now()
+        ''', (source_file, content_hash))
+
+
+    def value_to_copy_text(self, value):
+        if value == None:
+            return '\\N'
+        elif isinstance(value, dict):
+            return self.escape_copy_text(self.json_encoder.encode(value))
         elif isinstance(value, list):
-            value_list = []
-            for item in value:
-                value_list.append(self.value_to_string(item))
-            list_string = ','.join(value_list)
-            return 'ARRAY[' + list_string + ']'
-        elif value == None or (isinstance(value, float) and math.isnan(value)):
-            return 'NULL'
+            return self.escape_copy_text(self.list_to_array_literal(value))
         elif isinstance(value, shapely.geometry.base.BaseGeometry):
-            return "ST_SetSRID(ST_GeomFromText('" + wkt.dumps(value) + "'), 4326)"
+            # hex encoded EWKB can be read directly by the geometry type, so no ST_GeomFromText call is needed
+            return wkb.dumps(value, hex=True, srid=4326)
         else:
-            return "'" + value + "'"
\ No newline at end of file
+            return self.escape_copy_text(str(value))
+
+
+    def list_to_array_literal(self, value):
+        # example: [{'quay_ref': 'NSR:Quay:1'}, None] -> {"{\"quay_ref\": \"NSR:Quay:1\"}",NULL}
+        items = []
+        for item in value:
+            if item == None:
+                items.append('NULL')
+            else:
+                if isinstance(item, dict):
+                    item = self.json_encoder.encode(item)
+                items.append('"' + str(item).replace('\\', '\\\\').replace('"', '\\"') + '"')
+
+        return '{' + ','.join(items) + '}'
+
+
+    def escape_copy_text(self, value):
+        # backslash, tab, newline and carriage return have a special meaning in the text format of the COPY command
+        return value.replace('\\', '\\\\').replace('\t', '\\t').replace('\n', '\\n').replace('\r', '\\r')
\ No newline at end of file
@@ -0,0 +1,32 @@
+from shared import camel_to_snake, get_tags
+from Final_Schema_Builder import table_names
+
+
+class Dispatch_Table_Builder:
+    def __init__(self, simplified_schema_graph, schema):
+        self.dispatch_tables = {}
+        self.simplified_schema_graph = simplified_schema_graph
+        self.schema = schema
+
+    def create_dispatch_tables(self):
+        # for every node of the simplified schema graph: xml tag of child element -> (column name, is_list, child node id, belongs to a separate table)
+        # this way the NeTEx_File_Reader can look up every child of a xml element directly, instead of searching through the edges of the node
+        # every tag is added without and with the namespaces of NeTEx files, so that the namespaces don't have to be removed from the xml elements
+        for node_id in self.simplified_schema_graph.nodes:
+            dispatch_table = {}
+
+            for edge in self.simplified_schema_graph.edges(node_id):
+                child_node_id = edge[1]
+                child_node = self.simplified_schema_graph.nodes[child_node_id]
+                name = child_node['name']
+
+                # if multiple child nodes have the same name, the node with the name as id is preferred, because table nodes have their name as id
+                if name in dispatch_table and dispatch_table[name][2] == name:
+                    continue
+
+                # all tables are marked, also the tables that aren't selected (see Final_Schema_Builder), so that their elements are skipped instead of added to the parent table
+                child_node = (camel_to_snake(name), child_node['is_list'], child_node_id, name in table_names)
+                for tag in get_tags(name):
+                    dispatch_table[tag] = child_node
+
+            self.dispatch_tables[node_id] = dispatch_table
\ No newline at end of file
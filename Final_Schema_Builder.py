@@ -3,7 +3,8 @@ from sqlalchemy.dialects.postgresql import JSONB
 from geoalchemy2.types import Geometry
 import itertools
 
-from shared import camel_to_snake
+from shared import camel_to_snake, run_iteratively
+from XSD_Type_Converter import XSD_Type_Converter
 
 table_names = [
     'PublicationDelivery', 'CompositeFrame', 'ResourceFrame', 'ServiceFrame', 'ServiceCalendarFrame', 'TimetableFrame', 'SiteFrame', 
@@ -13,22 +14,43 @@ table_names = [
     'TopographicPlace', 'GroupOfStopPlaces', 'StopPlace', 'Quay', 'Parking', 'ParkingCapacity', 'TariffZone', 'GroupOfTariffZones', 'FareZone'
 ]
 
+# the largest tables, they can be partitioned by 'source_file', so that the rows of a file can be replaced by truncating their partition
+partitioned_table_names = ['ServiceJourney', 'TimetabledPassingTime']
+
 class Final_Schema_Builder:
-    def __init__(self, simplified_schema_graph):
+    def __init__(self, simplified_schema_graph, selected_table_names=None):
         self.schema = {}
         self.simplified_schema_graph = simplified_schema_graph
+        self.xsd_type_converter = XSD_Type_Converter()
+
+        # only the selected tables and the tables which can contain them are part of the schema, None selects all tables
+        # example: 'Quay' -> 'Quay', 'StopPlace', 'SiteFrame', 'CompositeFrame', 'PublicationDelivery'
+        if selected_table_names == None:
+            self.needed_table_names = set(table_names)
+        else:
+            self.needed_table_names = self.get_needed_table_names(selected_table_names)
 
     def create_schema(self, node_id, parent_node_name, already_visited_node_ids):
+        # the graph is traversed with an explicit stack instead of recursion (see run_iteratively), so deep graphs don't reach the recursion limit
+        run_iteratively(self.create_schema_generator(node_id, parent_node_name, already_visited_node_ids))
+
+
+    def create_schema_generator(self, node_id, parent_node_name, already_visited_node_ids):
+        # tables that aren't needed (and everything inside of them) aren't resolved
+        if node_id in table_names and node_id not in self.needed_table_names:
+            return
+
         # prevent endless loop
+        # already_visited_node_ids is a set, a list would make the check slower with every visited node
         if not node_id in already_visited_node_ids:
-            already_visited_node_ids.append(node_id)
+            already_visited_node_ids.add(node_id)
             table_property_elements = {}
         
             for edge in self.simplified_schema_graph.edges(node_id):
                 target_node_id = edge[1]
                 
                 if node_id in table_names:
-                    self.create_schema(target_node_id, node_id, already_visited_node_ids)
+                    yield self.create_schema_generator(target_node_id, node_id, already_visited_node_ids)
                     
                     target_node = self.simplified_schema_graph.nodes[target_node_id]
                     edges = self.simplified_schema_graph.edges([target_node_id])
@@ -36,6 +58,7 @@ class Final_Schema_Builder:
                     # if node has element children, the column should be the type dict
                     is_dict = False
                     is_list = False
+                    xsd_type = None
                     for edge in edges:
                         if self.simplified_schema_graph.nodes[edge[1]]['node_type'] == 'element':
                             is_dict = True
@@ -56,28 +79,78 @@ class Final_Schema_Builder:
                     elif is_dict:
                         column_type = JSONB
                     else:
-                        column_type = String
+                        # elements with a text value get the column type of their xsd simple type (example: 'DepartureTime' -> xsd:time -> Time)
+                        xsd_type = target_node.get('content_type')
+                        column_type = self.xsd_type_converter.get_column_type(xsd_type)
                         
-                    table_property_elements[target_node['name']] = {'column_type': column_type, 'is_list': is_list}
+                    table_property_elements[target_node['name']] = {'column_type': column_type, 'is_list': is_list, 'xsd_type': xsd_type}
                 else:
-                    self.create_schema(target_node_id, parent_node_name, already_visited_node_ids)  
+                    yield self.create_schema_generator(target_node_id, parent_node_name, already_visited_node_ids)  
                     
             if node_id in table_names:
                 table_property_elements['id'] = {'column_type': String, 'is_list': False}
                 table_property_elements['attributes'] = {'column_type': JSONB, 'is_list': False}
                 table_property_elements['geom'] = {'column_type': Geometry, 'is_list': False}
+                # 'version' is also part of 'attributes', but as column it can be used together with 'id' to identify an element version
+                table_property_elements['version'] = {'column_type': String, 'is_list': False}
+                # name of the NeTEx file the row comes from, needed to replace the rows of a changed file
+                table_property_elements['source_file'] = {'column_type': String, 'is_list': False}
                 
                 if parent_node_name != None:
                     # Except the 'PublicationDelivery' node every node in NeTEx has a parent node. 
                     # For example 'StopPlace' can have 'GroupOfStopPlaces' as a parent node.
                     # To represent this relation in a relational schema every child node has a parent node property
                     table_property_elements['parent_id'] = {'column_type': String, 'is_list': False}
+                    # ids of all ancestor elements (from the root to the parent), only filled if the ingestion is run with ancestor ids
+                    # with a gin index the rows of a whole subtree can be found without a recursive query, example: 'ancestor_ids @> ARRAY[<GroupOfStopPlaces id>]'
+                    table_property_elements['ancestor_ids'] = {'column_type': ARRAY(String), 'is_list': True}
                     
                 
                 self.schema[node_id] = table_property_elements
 
 
-    def create_tables_in_database(self, db_connection_url):
+    def get_needed_table_names(self, selected_table_names):
+        for table_name in selected_table_names:
+            if table_name not in table_names:
+                raise Exception(f'unknown table: {table_name}')
+
+        child_tables = {table_name: self.get_child_tables(table_name) for table_name in table_names if table_name in self.simplified_schema_graph.nodes}
+
+        # add the parent tables of the needed tables, until all ancestors are added
+        needed_table_names = set(selected_table_names)
+        has_changed = True
+        while has_changed:
+            has_changed = False
+            for table_name, child_table_names in child_tables.items():
+                if table_name not in needed_table_names and len(child_table_names & needed_table_names) > 0:
+                    needed_table_names.add(table_name)
+                    has_changed = True
+
+        return needed_table_names
+
+
+    def get_child_tables(self, table_name):
+        # returns the tables that can be reached from the table without passing another table
+        child_table_names = set()
+        already_visited_node_ids = {table_name}
+        node_ids = [table_name]
+
+        while len(node_ids) > 0:
+            for edge in self.simplified_schema_graph.edges(node_ids.pop()):
+                target_node_id = edge[1]
+                if target_node_id in already_visited_node_ids:
+                    continue
+                already_visited_node_ids.add(target_node_id)
+
+                if target_node_id in table_names:
+                    child_table_names.add(target_node_id)
+                else:
+                    node_ids.append(target_node_id)
+
+        return child_table_names
+
+
+    def create_tables_in_database(self, db_connection_url, partitioned=False, ancestor_ids=False):
         postgresql_db = create_engine(db_connection_url)
         post_meta = MetaData(bind=postgresql_db.engine)
 
@@ -90,13 +163,27 @@ class Final_Schema_Builder:
             primary_key_flags = list(itertools.repeat(False, len(columns)))
             nullable_flags = list(itertools.repeat(True, len(columns)))
             
+            # every file gets its own partition during the ingestion (see Database_Handler.create_partition)
+            table_kwargs = {}
+            is_partitioned = partitioned and table_key in [camel_to_snake(table_name) for table_name in partitioned_table_names]
+            if is_partitioned:
+                table_kwargs['postgresql_partition_by'] = 'LIST (source_file)'
+
             table = Table(
                 table_key, post_meta,
                 *(Column(
                     column_name, column_type, primary_key=primary_key_flag, nullable=nullable_flag)
                     for column_name, column_type, primary_key_flag, nullable_flag 
                     in zip(column_names, columns_types, primary_key_flags, nullable_flags)
-                )
+                ),
+                **table_kwargs
             )
 
-            table.create()
\ No newline at end of file
+            table.create()
+
+            if is_partitioned:
+                # rows without a source file
+                postgresql_db.engine.execute(f'CREATE TABLE {table_key}__default PARTITION OF {table_key} DEFAULT')
+
+            if ancestor_ids and 'ancestor_ids' in column_names:
+                postgresql_db.engine.execute(f'CREATE INDEX {table_key}_ancestor_ids_idx ON {table_key} USING GIN (ancestor_ids)')
\ No newline at end of file
@@ -0,0 +1,141 @@
+import numpy as np
+import pyproj
+import shapely
+import warnings
+from shapely.geometry import LineString, Polygon
+
+from shared import local_name
+
+
+class Geometry_Handler:
+    # creating a CRS or a transformer takes a lot longer than transforming the coordinates of a geometry
+    # for this reason they are cached for all instances of the class
+    srids = {}
+    transformers = {}
+    is_yx_axis_order = {}
+
+    def gml_to_shapely(self, gml_geometry):
+        # reads the coordinates of a gml 'LineString' or 'Polygon' element directly from the xml element
+        # if the geometry isn't in EPSG:4326, the returned geometry has the spatial reference identifier of its spatial reference system
+        srs_name = gml_geometry.get('srsName')
+
+        # if spatial reference system isn't specified in gml geometry, EPSG:4326 is assumed
+        if srs_name == None:
+            srs_name = 'EPSG:4326'
+        # correct spelling mistake
+        srs_name = srs_name.replace('ESPG:', 'EPSG:')
+        if 'EPSG' not in srs_name:
+            srs_name = f'EPSG:{srs_name}'
+
+        srs_dimension = gml_geometry.get('srsDimension')
+        is_yx = self.get_is_yx_axis_order(srs_name)
+        # the elements can have the gml namespace (see XML_Handler)
+        geometry_type = local_name(gml_geometry.tag)
+
+        if geometry_type == 'LineString':
+            coordinates = self.read_coordinates(gml_geometry, srs_dimension, is_yx)
+            if coordinates is None or len(coordinates) < 2:
+                return None
+            geom = LineString(coordinates)
+        elif geometry_type == 'Polygon':
+            exterior = None
+            interiors = []
+
+            for child in gml_geometry:
+                child_name = local_name(child.tag)
+                if child_name in ['exterior', 'interior']:
+                    linear_ring = child.find('{*}LinearRing')
+                    if linear_ring == None:
+                        continue
+
+                    coordinates = self.read_coordinates(linear_ring, srs_dimension, is_yx)
+                    if coordinates is None:
+                        return None
+                    if len(coordinates) < 4:
+                        continue
+
+                    if child_name == 'exterior':
+                        exterior = coordinates
+                    else:
+                        interiors.append(coordinates)
+
+            if exterior is None:
+                return None
+            geom = Polygon(exterior, interiors)
+        else:
+            return None
+
+        srid = self.get_srid(srs_name)
+        if srid != None and srid != 4326:
+            geom = shapely.set_srid(geom, srid)
+
+        return geom
+
+
+    def read_coordinates(self, gml_element, srs_dimension, is_yx):
+        # returns the coordinates of a 'posList' or of multiple 'pos' elements as numpy array with the shape (number of coordinates, 2)
+        # returns None if the text isn't a list of numbers or if the number of values isn't a multiple of the dimension
+        texts = []
+        for child in gml_element:
+            child_name = local_name(child.tag)
+            if child_name == 'posList':
+                srs_dimension = child.get('srsDimension', srs_dimension)
+                texts.append(child.text or '')
+            elif child_name == 'pos':
+                texts.append(child.text or '')
+
+        try:
+            dimension = int(srs_dimension) if srs_dimension != None else 2
+            # numpy raises a ValueError for malformed texts, older versions only warn and return the values before the malformed part
+            with warnings.catch_warnings():
+                warnings.simplefilter('error', DeprecationWarning)
+                values = np.fromstring(' '.join(texts), dtype=np.float64, sep=' ')
+        except (ValueError, DeprecationWarning):
+            return None
+
+        if dimension < 2 or values.size % dimension != 0:
+            return None
+        coordinates = values.reshape(-1, dimension)[:, :2]
+
+        if is_yx:
+            coordinates = coordinates[:, ::-1]
+
+        return np.ascontiguousarray(coordinates)
+
+
+    def get_is_yx_axis_order(self, srs_name):
+        # same rule as the library pygml, which was used before:
+        # the short form 'EPSG:<code>' and 'http://www.opengis.net/gml/srs/epsg.xml#<code>' are always in x/y order
+        # the urn and uri forms use the axis order of the spatial reference system, example: 'urn:ogc:def:crs:EPSG::4326' is in latitude/longitude order
+        if srs_name not in self.is_yx_axis_order:
+            if srs_name.startswith('EPSG:') or 'epsg.xml#' in srs_name:
+                self.is_yx_axis_order[srs_name] = False
+            else:
+                axis_info = pyproj.CRS(srs_name).axis_info
+                self.is_yx_axis_order[srs_name] = len(axis_info) > 0 and axis_info[0].direction in ['north', 'south']
+        return self.is_yx_axis_order[srs_name]
+
+
+    def get_srid(self, crs):
+        # example: 'EPSG:25833' or 'urn:ogc:def:crs:EPSG::25833' -> 25833
+        if crs not in self.srids:
+            self.srids[crs] = pyproj.CRS(crs).to_epsg()
+        return self.srids[crs]
+
+
+    def get_transformer(self, srid):
+        if srid not in self.transformers:
+            self.transformers[srid] = pyproj.Transformer.from_crs(pyproj.CRS.from_epsg(srid), pyproj.CRS.from_epsg(4326), always_xy=True)
+        return self.transformers[srid]
+
+
+    def reproject(self, geometries, srid):
+        # transforms the geometries from the spatial reference system srid to EPSG:4326
+        # the coordinates of all geometries are transformed with a single call, instead of one call per coordinate
+        transformer = self.get_transformer(srid)
+
+        def transform_coordinates(coordinates):
+            x, y = transformer.transform(coordinates[:, 0], coordinates[:, 1])
+            return np.column_stack([x, y])
+
+        return list(shapely.transform(np.array(geometries, dtype=object), transform_coordinates))
\ No newline at end of file
@@ -0,0 +1,191 @@
+import contextlib
+import threading
+import resource
+import json
+import time
+
+
+class Ingestion_Metrics:
+    def __init__(self):
+        # one record per ingested file, see create_file_record
+        self.files = []
+        self.current_file = self.create_file_record(None)
+        self.file_start = None
+        # records of another thread (example: the load stage of Queue_Sink) that get merged into the record of the same file, see merge_file
+        self.pending_merges = {}
+        self.lock = threading.Lock()
+
+    def create_file_record(self, source_file):
+        return {
+            'source_file': source_file,
+            'wall_seconds': 0.0,
+            'cpu_seconds': 0.0,
+            'peak_rss_bytes': 0,
+            # stage name -> {'wall_seconds', 'cpu_seconds', 'calls'}
+            # stages can be nested, example: 'geometry' is part of 'query_node'
+            'stages': {},
+            # table name -> {'rows', 'bytes'}
+            'tables': {},
+            # table name -> column name -> number of texts that couldn't be converted to the type of the column and were stored as null
+            'rejected_values': {}
+        }
+
+
+    def start_file(self, source_file):
+        # the cpu time is measured per thread, the stages of the pipeline run in concurrent threads (see NeTEx_Ingestor.ingest_files_pipelined)
+        # the cpu time of the other threads is added with the merged records and the parse stage durations
+        self.current_file = self.create_file_record(source_file)
+        self.file_start = (time.perf_counter(), time.thread_time())
+
+
+    def end_file(self):
+        record = self.current_file
+        record['wall_seconds'] = time.perf_counter() - self.file_start[0]
+        record['cpu_seconds'] += time.thread_time() - self.file_start[1]
+        record['peak_rss_bytes'] = self.get_peak_rss()
+
+        with self.lock:
+            self.files.append(record)
+            if record['source_file'] in self.pending_merges:
+                self.add_record(record, self.pending_merges.pop(record['source_file']))
+        self.current_file = self.create_file_record(None)
+
+        return record
+
+
+    def add_file(self, record):
+        # adds the record of a file that was ingested in another process
+        self.files.append(record)
+
+
+    def merge_file(self, merged_record):
+        # adds the stages and tables of a record, which was measured in another thread, to the record of the same file
+        # the record of the file may not exist yet, in this case the record is merged when the file ends
+        with self.lock:
+            for record in reversed(self.files):
+                if record['source_file'] == merged_record['source_file']:
+                    self.add_record(record, merged_record)
+                    return
+
+            if merged_record['source_file'] in self.pending_merges:
+                self.add_record(self.pending_merges[merged_record['source_file']], merged_record)
+            else:
+                self.pending_merges[merged_record['source_file']] = merged_record
+
+
+    def add_record(self, record, added_record):
+        for stage_name, added_stage in added_record['stages'].items():
+            stage = record['stages'].setdefault(stage_name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'calls': 0})
+            for key in stage.keys():
+                stage[key] += added_stage[key]
+
+        for table_name, added_table in added_record['tables'].items():
+            table = record['tables'].setdefault(table_name, {'rows': 0, 'bytes': 0})
+            for key in table.keys():
+                table[key] += added_table[key]
+
+        for table_name, added_columns in added_record['rejected_values'].items():
+            columns = record['rejected_values'].setdefault(table_name, {})
+            for column_name, count in added_columns.items():
+                columns[column_name] = columns.get(column_name, 0) + count
+
+        record['cpu_seconds'] += added_record['cpu_seconds']
+        record['peak_rss_bytes'] = max(record['peak_rss_bytes'], added_record['peak_rss_bytes'])
+
+
+    @contextlib.contextmanager
+    def stage(self, stage_name):
+        wall_start = time.perf_counter()
+        cpu_start = time.thread_time()
+        try:
+            yield
+        finally:
+            self.add_stage_time(stage_name, time.perf_counter() - wall_start, time.thread_time() - cpu_start)
+
+
+    def add_stage_time(self, stage_name, wall_seconds, cpu_seconds):
+        stage = self.current_file['stages'].setdefault(stage_name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'calls': 0})
+        stage['wall_seconds'] += wall_seconds
+        stage['cpu_seconds'] += cpu_seconds
+        stage['calls'] += 1
+
+
+    def add_table_rows(self, table_name, rows, size):
+        table = self.current_file['tables'].setdefault(table_name, {'rows': 0, 'bytes': 0})
+        table['rows'] += rows
+        table['bytes'] += size
+
+
+    def add_rejected_value(self, table_name, column_name):
+        # see XSD_Type_Converter, the rejected value is stored as null
+        columns = self.current_file['rejected_values'].setdefault(table_name, {})
+        columns[column_name] = columns.get(column_name, 0) + 1
+
+
+    def get_peak_rss(self):
+        # ru_maxrss is in kilobytes on linux
+        return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss * 1024
+
+
+    def report(self):
+        stages = {}
+        tables = {}
+        rejected_values = {}
+
+        for record in self.files:
+            for stage_name, stage in record['stages'].items():
+                total = stages.setdefault(stage_name, {'wall_seconds': 0.0, 'cpu_seconds': 0.0, 'calls': 0})
+                for key in total.keys():
+                    total[key] += stage[key]
+
+            for table_name, table in record['tables'].items():
+                total = tables.setdefault(table_name, {'rows': 0, 'bytes': 0})
+                for key in total.keys():
+                    total[key] += table[key]
+
+            for table_name, columns in record['rejected_values'].items():
+                total = rejected_values.setdefault(table_name, {})
+                for column_name, count in columns.items():
+                    total[column_name] = total.get(column_name, 0) + count
+
+        return {
+            'files': self.files,
+            'wall_seconds': sum(record['wall_seconds'] for record in self.files),
+            'cpu_seconds': sum(record['cpu_seconds'] for record in self.files),
+            'peak_rss_bytes': max([record['peak_rss_bytes'] for record in self.files] + [self.get_peak_rss()]),
+            'stages': stages,
+            'tables': tables,
+            'rejected_values': rejected_values
+        }
+
+
+    def write_json(self, path):
+        with open(path, 'w') as file:
+            json.dump(self.report(), file, indent=2)
+
+
+    def write_prometheus(self, path):
+        # text exposition format of prometheus, can be used with the textfile collector of the node exporter
+        report = self.report()
+        lines = [
+            '# TYPE netex_ingestion_files_total counter',
+            f'netex_ingestion_files_total {len(report["files"])}',
+            '# TYPE netex_ingestion_peak_rss_bytes gauge',
+            f'netex_ingestion_peak_rss_bytes {report["peak_rss_bytes"]}',
+            '# TYPE netex_ingestion_stage_wall_seconds_total counter'
+        ]
+        lines += [f'netex_ingestion_stage_wall_seconds_total{{stage="{name}"}} {stage["wall_seconds"]}' for name, stage in report['stages'].items()]
+        lines.append('# TYPE netex_ingestion_stage_cpu_seconds_total counter')
+        lines += [f'netex_ingestion_stage_cpu_seconds_total{{stage="{name}"}} {stage["cpu_seconds"]}' for name, stage in report['stages'].items()]
+        lines.append('# TYPE netex_ingestion_rows_total counter')
+        lines += [f'netex_ingestion_rows_total{{table="{name}"}} {table["rows"]}' for name, table in report['tables'].items()]
+        lines.append('# TYPE netex_ingestion_bytes_total counter')
+        lines += [f'netex_ingestion_bytes_total{{table="{name}"}} {table["bytes"]}' for name, table in report['tables'].items()]
+        lines.append('# TYPE netex_ingestion_rejected_values_total counter')
+        lines += [
+            f'netex_ingestion_rejected_values_total{{table="{table_name}",column="{column_name}"}} {count}'
+            for table_name, columns in report['rejected_values'].items() for column_name, count in columns.items()
+        ]
+
+        with open(path, 'w') as file:
+            file.write('\n'.join(lines) + '\n')
\ No newline at end of file
@@ -0,0 +1,28 @@
+import json
+
+# optional dependency, orjson encodes a lot faster than the json module, which is used if orjson isn't installed
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+
+class JSON_Encoder:
+    # encodes the values of the jsonb columns (dicts of nested xml elements, example: 'attributes') and of the items of ARRAY(JSONB) columns
+    # the texts of the xml elements are encoded unchanged, quotes, apostrophes, backslashes and control characters are escaped by the json encoding
+    # the result is the same with and without orjson: compact and not ascii escaped
+
+    def encode(self, value):
+        if orjson != None:
+            return orjson.dumps(value).decode()
+        return json.dumps(value, ensure_ascii=False, separators=(',', ':'))
+
+
+    def encode_values(self, values):
+        # encodes the dicts of a whole column, all other values (also None) are returned unchanged
+        if orjson != None:
+            dumps = orjson.dumps
+            return [dumps(value).decode() if isinstance(value, dict) else value for value in values]
+
+        encode = self.encode
+        return [encode(value) if isinstance(value, dict) else value for value in values]
@@ -1,99 +1,168 @@
+import collections
 import uuid
-from lxml import etree
-import re
-import pygml
-from shapely.geometry import shape, Point
-from shapely.ops import transform
-import pyproj
+import shapely
+from shapely.geometry import Point
 
-from shared import camel_to_snake
+from shared import camel_to_snake, run_iteratively, get_tags, local_name
+from Dispatch_Table_Builder import Dispatch_Table_Builder
+from Geometry_Handler import Geometry_Handler
+from Ingestion_Metrics import Ingestion_Metrics
+from XSD_Type_Converter import XSD_Type_Converter
+from Column_Store import Column_Store, column_store_table_names
+
+# tags of the elements that are transformed to geometries, with and without namespaces
+geometry_tags = set(get_tags('LineString') + get_tags('Polygon'))
+centroid_tags = set(get_tags('Centroid'))
 
 
 class NeTEx_File_Reader:
-    def __init__(self, schema, simplified_schema_graph):
+    def __init__(self, schema, simplified_schema_graph, dispatch_tables=None, metrics=None, ancestor_ids=False):
         self.schema = schema
         self.simplified_schema_graph = simplified_schema_graph
-        self.results = {camel_to_snake(key): [] for key in schema.keys()}
+        self.table_names = {key: camel_to_snake(key) for key in schema.keys()}
+        self.results = self.create_results()
+
+        if dispatch_tables == None:
+            dispatch_table_builder = Dispatch_Table_Builder(simplified_schema_graph, schema)
+            dispatch_table_builder.create_dispatch_tables()
+            dispatch_tables = dispatch_table_builder.dispatch_tables
+        self.dispatch_tables = dispatch_tables
+
+        # table -> column name -> function that converts the text of the column to the type of the column (example: 'DepartureTime' -> datetime.time)
+        xsd_type_converter = XSD_Type_Converter()
+        self.converters = {table_name: {} for table_name in schema.keys()}
+        for table_name, columns in schema.items():
+            for column_name, column in columns.items():
+                converter = xsd_type_converter.get_converter(column.get('xsd_type'))
+                if converter != None:
+                    self.converters[table_name][camel_to_snake(column_name)] = converter
+
+        self.metrics = metrics if metrics != None else Ingestion_Metrics()
+        self.geometry_handler = Geometry_Handler()
+        # rows with a geometry that isn't in EPSG:4326 yet, see reproject_geometries
+        self.pending_reprojections = []
+        # table elements that were found by add_row, but aren't added yet: (xml element, simplified schema node id, parent node tag, parent node id, ancestor ids)
+        self.pending_tables = collections.deque()
+        # if True, every row gets the ids of all its ancestor elements in the column 'ancestor_ids' (from the root to the parent)
+        # example: a 'Quay' row gets [<PublicationDelivery id>, <SiteFrame id>, <StopPlace id>], so all quays of a frame can be found with one indexed lookup
+        self.with_ancestor_ids = ancestor_ids
+
+
+    def query_node(self, node, simplified_schema_node_id, parent_node_tag, parent_node_id, ancestor_ids=None):
+        # the table elements inside of the node are queued by query_child_table and processed in a loop instead of recursively
+        # this way deep nesting doesn't reach the recursion limit of python
+        self.pending_tables.append((node, simplified_schema_node_id, parent_node_tag, parent_node_id, ancestor_ids))
+
+        while len(self.pending_tables) > 0:
+            node, simplified_schema_node_id, parent_node_tag, parent_node_id, ancestor_ids = self.pending_tables.popleft()
 
+            node_id = node.get('id')
+            if node_id == None:
+                node_id = str(uuid.uuid4())
 
-    def query_node(self, node, simplified_schema_node_id, parent_node_tag, parent_node_id):
+            self.add_row(node, simplified_schema_node_id, parent_node_tag, parent_node_id, node_id, ancestor_ids)
+
+
+    def query_child_table(self, node, simplified_schema_node_id, parent_node_tag, parent_node_id, ancestor_ids=None):
+        self.pending_tables.append((node, simplified_schema_node_id, parent_node_tag, parent_node_id, ancestor_ids))
+
+
+    def add_row(self, node, simplified_schema_node_id, parent_node_tag, parent_node_id, node_id, ancestor_ids=None):
         result = {}
-    
-        child_ids_from_xml = [child.tag for child in node]
-        
-        node_id = node.get('id')
-        if node_id == None:
-            node_id = str(uuid.uuid4())
+        dispatch_table = self.dispatch_tables[simplified_schema_node_id]
+        # the xml elements can have namespaces (see XML_Handler), the dispatch tables contain the tags with and without namespaces
+        table_key = local_name(node.tag)
+        converters = self.converters[table_key]
+        # only the first xml element with a specific tag is used
+        visited_tags = set()
+        geometry_child = None
+
+        # the ancestor ids of the child tables, the same list is used by all child rows of the node
+        child_ancestor_ids = None
+        if self.with_ancestor_ids:
+            child_ancestor_ids = (ancestor_ids or []) + [node_id]
         
-        for edge in self.simplified_schema_graph.edges(simplified_schema_node_id):
-            child_node_id_from_schema_graph = edge[1]
-            child_node_from_schema_graph = self.simplified_schema_graph.nodes[child_node_id_from_schema_graph]
-            child_node_name = child_node_from_schema_graph['name']
+        for child_xml in node:
+            tag = child_xml.tag
+
+            if geometry_child == None and tag in geometry_tags:
+                geometry_child = child_xml
+
+            child_node = dispatch_table.get(tag)
+            if child_node == None or tag in visited_tags:
+                continue
+            visited_tags.add(tag)
+
+            # every database column should be snake case (the dispatch table already contains the snake case name)
+            child_node_name, child_node_is_list, child_node_id_from_schema_graph, _ = child_node
             
-            if child_node_name in child_ids_from_xml:
-                child_xml = [child for child in node if child.tag == child_node_name][0]
-                # every database column should be snake case
-                child_node_name = camel_to_snake(child_node_name)
-                
-                # check if element belongs to a separate table
-                # Example:
-                # 'Operator' belongs to a seperate table, because it's part of the specified schema.
-                # 'ContactDetails' doesn't belongs to a seperate table and for this reason it's part of the parent node table
-                belongs_to_a_seperate_table = False
-
-                # sometimes the child of the child of the node belongs to a separate table
-                # example: node: 'StopPlace', child: 'quays', child of child: 'Quay' (belongs to a seperate table)
-                for child_of_child in child_xml:
-                    if child_of_child.tag in self.schema.keys():
-                        belongs_to_a_seperate_table = True
-
-                        # get the node id specified in the simplified_schema_graph from the child_of_child xml element
-                        child_of_child_node_id_from_schema_graph = [
-                            edge[1] for edge in self.simplified_schema_graph.edges(child_node_id_from_schema_graph) if edge[1] == child_of_child.tag
-                        ][0]
-
-                        self.query_node(child_of_child, child_of_child_node_id_from_schema_graph, node.tag, node_id)
-
-                if not belongs_to_a_seperate_table:
-                    # 'Centroid' should be transformed first to shapely geometry and then added to results
-                    if child_xml.tag == 'Centroid':
-                        result['geom'] = self.centroid_to_shapely(child_xml)
-                    # if child xml element has children, transform the children to dict and save it in the result dict
-                    elif len(child_xml) > 0:
-                        if child_node_from_schema_graph['is_list']:
-                            result_list, geom = self.xml_to_list(child_xml, child_node_id_from_schema_graph)
-                            
-                            # only if list has values add it to result dict
-                            if len(result_list) > 0:
-                                result[child_node_name] = result_list
-                            else:
-                                result[child_node_name] = None
-                        else:
-                            result_dict, geom = self.xml_to_dict(child_xml, child_node_id_from_schema_graph)
-
-                            # if dict has no value, the value added to result dict should be just None
-                            # example for dict with no values: {'PointProjection': {'ProjectedPointRef': None}}
-                            if self.check_if_dict_has_values(result_dict):
-                                result[child_node_name] = result_dict
-                            else:
-                                result[child_node_name] = None
+            # check if element belongs to a separate table
+            # Example:
+            # 'Operator' belongs to a seperate table, because it's part of the specified schema.
+            # 'ContactDetails' doesn't belongs to a seperate table and for this reason it's part of the parent node table
+            belongs_to_a_seperate_table = False
+
+            # sometimes the child of the child of the node belongs to a separate table
+            # example: node: 'StopPlace', child: 'quays', child of child: 'Quay' (belongs to a seperate table)
+            child_dispatch_table = self.dispatch_tables[child_node_id_from_schema_graph]
+            for child_of_child in child_xml:
+                child_of_child_node = child_dispatch_table.get(child_of_child.tag)
+
+                if child_of_child_node != None and child_of_child_node[3]:
+                    belongs_to_a_seperate_table = True
+                    # tables that aren't part of the schema (see the table selection of Schema_Plan) are skipped without traversing them
+                    if local_name(child_of_child.tag) in self.table_names:
+                        self.query_child_table(child_of_child, child_of_child_node[2], table_key, node_id, child_ancestor_ids)
+
+            if not belongs_to_a_seperate_table:
+                # 'Centroid' should be transformed first to shapely geometry and then added to results
+                if tag in centroid_tags:
+                    result['geom'] = self.centroid_to_shapely(child_xml)
+                # if child xml element has children, transform the children to dict and save it in the result dict
+                elif len(child_xml) > 0:
+                    if child_node_is_list:
+                        result_list, geom = self.xml_to_list(child_xml, child_node_id_from_schema_graph)
                         
-                        if geom != None:
-                            result['geom'] = geom
-                    # check if element is ref element (= elements that link to other elements)
-                    # if that's the case save the ref attribute as value in column
-                    # example: <QuayRef ref="NSR:Quay:39450" version="1"/> in element 'PassengerStopAssignment'
-                    elif child_xml.tag[-3:] == 'Ref' and child_xml.get('ref') != None:
-                        result[child_node_name] = child_xml.get('ref')
-                    elif child_xml.text != None:
-                        text_value = child_xml.text.replace('\x96', '').replace("'", '').replace('"', '')
-                        result[child_node_name] = text_value
+                        # only if list has values add it to result dict
+                        if len(result_list) > 0:
+                            result[child_node_name] = result_list
+                        else:
+                            result[child_node_name] = None
                     else:
-                        result[child_node_name] = None
+                        result_dict, geom = self.xml_to_dict(child_xml, child_node_id_from_schema_graph)
+
+                        # if dict has no value, the value added to result dict should be just None
+                        # example for dict with no values: {'PointProjection': {'ProjectedPointRef': None}}
+                        if self.check_if_dict_has_values(result_dict):
+                            result[child_node_name] = result_dict
+                        else:
+                            result[child_node_name] = None
+                    
+                    if geom != None:
+                        result['geom'] = geom
+                # check if element is ref element (= elements that link to other elements)
+                # if that's the case save the ref attribute as value in column
+                # example: <QuayRef ref="NSR:Quay:39450" version="1"/> in element 'PassengerStopAssignment'
+                elif tag[-3:] == 'Ref' and child_xml.get('ref') != None:
+                    result[child_node_name] = child_xml.get('ref')
+                elif child_xml.text != None:
+                    # the text is kept unchanged, quotes and apostrophes are escaped when the rows are encoded (see JSON_Encoder and Database_Handler)
+                    converter = converters.get(child_node_name)
+                    if converter == None:
+                        result[child_node_name] = child_xml.text
+                    else:
+                        result[child_node_name] = converter(child_xml.text)
+                        # the value is stored as null, the rejected values of every column are counted, so that the loss of data is visible
+                        if result[child_node_name] == None:
+                            self.metrics.add_rejected_value(self.table_names[table_key], child_node_name)
+                else:
+                    result[child_node_name] = None
                         
         # add parent node id to result so that the nested xml structure get represented in a relational structure without data loss
         if parent_node_tag != None and parent_node_tag != None:
             result['parent_id'] = parent_node_id
+            if self.with_ancestor_ids:
+                result['ancestor_ids'] = ancestor_ids
                         
         # add attributes to result
         attributes = {}
@@ -102,100 +171,132 @@ class NeTEx_File_Reader:
                 attributes[attribute] = node.get(attribute)
         
         result['id'] = node_id
+        result['version'] = node.get('version')
         result['attributes'] = attributes
         
         # in some NeTEx files gml geometries get added to xml elements although this is not defined in the NeTEx xsd schema files
         # example (07.05.2022, NeTEx Norway): the elements 'TopographicPlace' and 'TariffZone' have gml geometries as child
         # because the geometries aren't part of the simplified_schema_graph, the following code should take care of this case
-        geometry_child = [child for child in node if child.tag in ['LineString', 'Polygon']]
-        
-        if len(geometry_child) > 0:
-            result['geom'] = self.gml_geometry_to_shapely(geometry_child[0])
+        if geometry_child != None:
+            result['geom'] = self.gml_geometry_to_shapely(geometry_child)
+
+        table_rows = self.results[self.table_names[table_key]]
+
+        if result.get('geom') != None and shapely.get_srid(result['geom']) not in [0, 4326]:
+            # a column store copies the values of the row, for this reason the geometry can't be transformed later
+            if isinstance(table_rows, Column_Store):
+                with self.metrics.stage('reproject'):
+                    result['geom'] = self.geometry_handler.reproject([result['geom']], shapely.get_srid(result['geom']))[0]
+            else:
+                self.pending_reprojections.append(result)
         
-        self.results[camel_to_snake(node.tag)].append(result)
+        table_rows.append(result)
+
+
+    def create_results(self):
+        # table name -> rows of the table, a list of dicts or a column store for the tables with a lot of small rows
+        results = {}
+        for table_key, table_name in self.table_names.items():
+            if table_key in column_store_table_names:
+                results[table_name] = Column_Store([camel_to_snake(column_name) for column_name in self.schema[table_key].keys() if column_name != 'source_file'])
+            else:
+                results[table_name] = []
+        return results
 
 
     def check_if_dict_has_values(self, input_dict):
-        has_value = False
-        
-        for value in input_dict.values():
-            if isinstance(value, dict):
-                has_value = self.check_if_dict_has_values(value) or has_value
-            elif value != None:
-                return True
-        return has_value
+        # the nested dicts are checked with an explicit stack, so deep nesting doesn't reach the recursion limit
+        dicts = [input_dict]
+
+        while len(dicts) > 0:
+            for value in dicts.pop().values():
+                if isinstance(value, dict):
+                    dicts.append(value)
+                elif value != None:
+                    return True
+        return False
 
     
     def xml_to_dict(self, xml_element, simplified_schema_node_id):
+        # nested elements are transformed with an explicit stack instead of recursion (see run_iteratively)
+        return run_iteratively(self.xml_to_dict_generator(xml_element, simplified_schema_node_id))
+
+
+    def xml_to_dict_generator(self, xml_element, simplified_schema_node_id):
         result = {}
-        child_ids_from_xml = [child.tag for child in xml_element]
         
         geom = self.handle_geometry(xml_element)
         
         # if xml element isn't geometry, transform xml to dictionary
         if geom == None:
-            for edge in self.simplified_schema_graph.edges(simplified_schema_node_id):
-                child_node_id_from_schema_graph = edge[1]
-                child_node_from_schema_graph = self.simplified_schema_graph.nodes[child_node_id_from_schema_graph]
-
-                if child_node_from_schema_graph['name'] in child_ids_from_xml:
-                    child_node_name = child_node_from_schema_graph['name']
-                    child_xml = [child for child in xml_element if child.tag == child_node_name][0]
-                    # every key in the dict should be snake case
-                    child_node_name = camel_to_snake(child_node_name)
-
-                    # example: 'FromDate' in 'AvailabilityCondition' is flagged as list, but don't have children. 'FromDate' just has a text value
-                    # for this reason the value added to the result dict should just be the text value, not a list from the xml_to_list function
-                    if len(child_xml) > 0 and child_node_from_schema_graph['is_list']:
-                        result[child_node_name], geom = self.xml_to_list(child_xml, child_node_id_from_schema_graph)
-                    elif len(child_xml) > 0:
-                        result[child_node_name], geom = self.xml_to_dict(child_xml, child_node_id_from_schema_graph)
-                    elif child_xml.tag[-3:] == 'Ref' and child_xml.get('ref') != None:
-                        result[child_node_name] = child_xml.get('ref')
-                    elif child_xml.text != None:
-                        text_value = child_xml.text.replace('\x96', '').replace("'", '').replace('"', '')
-                        result[child_node_name] = text_value
-                    else:
-                        result[child_node_name] = None
+            dispatch_table = self.dispatch_tables[simplified_schema_node_id]
+
+            for child_xml in xml_element:
+                child_node = dispatch_table.get(child_xml.tag)
+                if child_node == None:
+                    continue
+
+                # every key in the dict should be snake case
+                child_node_name, child_node_is_list, child_node_id_from_schema_graph, _ = child_node
+                # only the first xml element with a specific tag is used
+                if child_node_name in result:
+                    continue
+
+                # example: 'FromDate' in 'AvailabilityCondition' is flagged as list, but don't have children. 'FromDate' just has a text value
+                # for this reason the value added to the result dict should just be the text value, not a list from the xml_to_list function
+                if len(child_xml) > 0 and child_node_is_list:
+                    result[child_node_name], child_geom = yield self.xml_to_list_generator(child_xml, child_node_id_from_schema_graph)
+                    if child_geom != None:
+                        geom = child_geom
+                elif len(child_xml) > 0:
+                    result[child_node_name], child_geom = yield self.xml_to_dict_generator(child_xml, child_node_id_from_schema_graph)
+                    if child_geom != None:
+                        geom = child_geom
+                elif child_xml.tag[-3:] == 'Ref' and child_xml.get('ref') != None:
+                    result[child_node_name] = child_xml.get('ref')
+                elif child_xml.text != None:
+                    result[child_node_name] = child_xml.text
+                else:
+                    result[child_node_name] = None
         
         return result, geom
 
 
     def xml_to_list(self, xml_element, simplified_schema_node_id):
+        return run_iteratively(self.xml_to_list_generator(xml_element, simplified_schema_node_id))
+
+
+    def xml_to_list_generator(self, xml_element, simplified_schema_node_id):
         result = []
         geom = None
 
-        simplified_schema_target_edge_ids = [edge[1] for edge in self.simplified_schema_graph.edges(simplified_schema_node_id)]
-        simplified_schema_target_nodes = [self.simplified_schema_graph.nodes[simplified_schema_target_edge_id] for simplified_schema_target_edge_id in simplified_schema_target_edge_ids]
+        dispatch_table = self.dispatch_tables[simplified_schema_node_id]
         
         for child_xml in xml_element:
             # get node id from child_xml in simplified schema graph
-            simplified_schema_target_node_id = [
-                target_edge_id for target_edge_id, target_node in zip(simplified_schema_target_edge_ids, simplified_schema_target_nodes) if target_node['name'] == child_xml.tag
-            ]
+            child_node = dispatch_table.get(child_xml.tag)
             
-            if len(simplified_schema_target_node_id) > 0:
-                simplified_schema_target_node_id = simplified_schema_target_node_id[0]
+            if child_node != None:
+                child_node_name, _, simplified_schema_target_node_id, _ = child_node
                 if len(child_xml) > 0:
-                    dict_value, geom = self.xml_to_dict(child_xml, simplified_schema_target_node_id)
+                    dict_value, geom = yield self.xml_to_dict_generator(child_xml, simplified_schema_target_node_id)
                     if dict_value != None:
                         result.append({
-                            camel_to_snake(child_xml.tag): dict_value
+                            child_node_name: dict_value
                         })
                     if geom != None:
                         return [], geom
                 elif child_xml.tag[-3:] == 'Ref' and child_xml.get('ref') != None:
                     result.append({
-                        camel_to_snake(child_xml.tag): child_xml.get('ref')
+                        child_node_name: child_xml.get('ref')
                     })
                 elif child_xml.text != None:
-                    text_value = child_xml.text.replace('\x96', '').replace("'", '').replace('"', '')
                     result.append({
-                        camel_to_snake(child_xml.tag): text_value
+                        child_node_name: child_xml.text
                     })
                 else:
                     result.append({
-                        camel_to_snake(child_xml.tag): None
+                        child_node_name: None
                     })
             else:
                 # missing element in simplified schema 
@@ -206,69 +307,46 @@ class NeTEx_File_Reader:
 
     
     def handle_geometry(self, xml_element):
-        child_geometry_element = [child for child in xml_element if child.tag in ['LineString', 'Polygon', 'Centroid']]
-        
-        if len(child_geometry_element) == 0:
-            # xml element isn't geometry
-            return None
-        # if the xml_element is a gml geometry, the gml geometry will be transformed into a shapely geometry
-        elif child_geometry_element[0].tag in ['LineString', 'Polygon']:
-            return self.gml_geometry_to_shapely(child_geometry_element[0])
-        else:
-            return None
-
-    
-    def gml_geometry_to_shapely(self, gml_geometry):
-        # xml elements to string, because the library pygml can only read strings
-        gml_string = etree.tostring(gml_geometry, encoding=str)
-
-        # TODO: add huge_tree feature to pygml package
-        if len(gml_string) > 5000000:
-            return None
+        for child in xml_element:
+            # if the xml_element is a gml geometry, the gml geometry will be transformed into a shapely geometry
+            if child.tag in geometry_tags:
+                return self.gml_geometry_to_shapely(child)
+            elif child.tag in centroid_tags:
+                return None
 
-        # get gml namespace
-        # example input: <gml:Polygon xmlns:ns2="http://www.opengis.net/gml/3.2" xmlns:xsi="http://www.w3.org/2001/XMLSchema-instance" ns2:id="GEN-PolygonType-1162673">
-        # example result: ns2
-        gml_namespace = re.search('(xmlns:)(.*)(="http:\/\/www.opengis.net\/gml\/3.2")', gml_string).groups()[1]
+        # xml element isn't geometry
+        return None
 
-        # edit gml string so that the library pygml can read it
-        # (I'm not sure if the following code covers all cases)
-        if gml_namespace != 'gml:':
-            gml_string = gml_string.replace(f':{gml_namespace}', ':gml')
-            gml_string = gml_string.replace(f'{gml_namespace}:', 'gml:')
-            gml_string = gml_string.replace('<', '<gml:')
-            gml_string = gml_string.replace('<gml:/', '</gml:')
 
-        # correct spelling mistake
-        gml_string = gml_string.replace('ESPG:', 'EPSG:')
-
-        # if spatial reference system isn't specified in gml geometry, add it
-        if 'srsName' not in gml_string:
-            gml_string = gml_string.replace('"http://www.opengis.net/gml/3.2"', '"http://www.opengis.net/gml/3.2" srsName="EPSG:4326"')
-        elif 'EPSG' not in gml_string:
-            gml_string = gml_string.replace('srsName="', 'srsName="EPSG:')
+    
+    def gml_geometry_to_shapely(self, gml_geometry):
+        # if spatial reference identifier of geometry isn't EPSG:4326, the geometry has to be transformed to this identifier, because all geometries should be in the same spatial reference system
+        # the transformation happens later in reproject_geometries for all geometries together, until then the geometry keeps its spatial reference identifier
+        with self.metrics.stage('geometry'):
+            return self.geometry_handler.gml_to_shapely(gml_geometry)
 
-        # transform gml string to shapely geometry
-        geom = pygml.parse(gml_string)
 
-        # if spatial reference identifier of geometry isn't EPSG:4326, transform the geometry to this identifier, because all geometries should be in the same spatial reference system
-        if 'crs' in geom.__geo_interface__.keys():
-            crs = geom.__geo_interface__['crs']['properties']['name']
-            geom = shape(geom)
+    def reproject_geometries(self):
+        # transforms the geometries of all rows that aren't in EPSG:4326, one batch per spatial reference system
+        # has to be called before the results are used
+        if len(self.pending_reprojections) == 0:
+            return
 
-            if crs != 'EPSG:4326':
-                target_crs = pyproj.CRS('EPSG:4326')
-                current_crs = pyproj.CRS(crs)
+        with self.metrics.stage('reproject'):
+            rows_by_srid = {}
+            for row in self.pending_reprojections:
+                rows_by_srid.setdefault(shapely.get_srid(row['geom']), []).append(row)
 
-                project = pyproj.Transformer.from_crs(current_crs, target_crs, always_xy=True).transform
-                geom = transform(project, geom)
-        else:
-            geom = shape(geom)
+            for srid, rows in rows_by_srid.items():
+                geometries = self.geometry_handler.reproject([row['geom'] for row in rows], srid)
+                for row, geom in zip(rows, geometries):
+                    row['geom'] = geom
 
-        return geom
+        self.pending_reprojections = []
 
 
     def centroid_to_shapely(self, xml_element):
-        latitude = float(xml_element.find('.//Latitude').text)
-        longitude = float(xml_element.find('.//Longitude').text)
+        # '{*}' matches the elements with and without namespace
+        latitude = float(xml_element.find('.//{*}Latitude').text)
+        longitude = float(xml_element.find('.//{*}Longitude').text)
         return Point(longitude, latitude)
\ No newline at end of file
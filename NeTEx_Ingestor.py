@@ -0,0 +1,298 @@
+import multiprocessing
+import collections
+import threading
+import cProfile
+import queue
+import time
+
+from XML_Handler import XML_Handler
+from NeTEx_Source import NeTEx_Source
+from NeTEx_File_Reader import NeTEx_File_Reader
+from NeTEx_Stream_Reader import NeTEx_Stream_Reader
+from Database_Handler import Database_Handler
+from Ingestion_Metrics import Ingestion_Metrics
+from Queue_Sink import Queue_Sink
+from shared import camel_to_snake
+
+
+class NeTEx_Ingestor:
+    def __init__(self, schema_plan, db_connection_url, stream=False, batch_size=50000, incremental=False, profiler=None, profile_path='.', commit_size=1, table_suffix='', parquet_path=None, pipeline_queue_size=None, keep_namespaces=False, ancestor_ids=False):
+        self.schema_plan = schema_plan
+        self.db_connection_url = db_connection_url
+        self.stream = stream
+        self.batch_size = batch_size
+        self.incremental = incremental
+        # number of files per transaction
+        self.commit_size = commit_size
+        # '__staging' inserts into the staging tables of the bulk load (see Bulk_Load_Manager)
+        self.table_suffix = table_suffix
+        # if set, the rows are written as parquet datasets to this directory instead of the database
+        self.parquet_path = parquet_path
+        # if set, parsing, reading and writing run as concurrent stages connected by queues with this size (see ingest_files_pipelined)
+        self.pipeline_queue_size = pipeline_queue_size
+        # if True, the namespaces aren't removed from the xml elements, the readers match the elements with their namespaces
+        self.keep_namespaces = keep_namespaces
+        # if True, the rows get the ids of all their ancestors in the column ancestor_ids (see NeTEx_File_Reader)
+        self.ancestor_ids = ancestor_ids
+        # 'cprofile' or 'pyinstrument' creates a profile for every file in profile_path
+        self.profiler = profiler
+        self.profile_path = profile_path
+        self.table_names = [camel_to_snake(table_name) for table_name in schema_plan.schema.keys()]
+        self.metrics = Ingestion_Metrics()
+        # one output sink (and with it one connection pool) for all files
+        if parquet_path != None:
+            # optional dependency, only needed for the parquet output
+            from Parquet_Sink import Parquet_Sink
+
+            self.output_sink = Parquet_Sink(parquet_path, schema_plan.schema, metrics=self.metrics)
+        else:
+            self.output_sink = Database_Handler(
+                db_connection_url, metrics=self.metrics, schema=schema_plan.schema, commit_size=commit_size, table_suffix=table_suffix
+            )
+
+        if pipeline_queue_size != None:
+            # the load stage measures its stages separately, they are merged into the metrics of the files
+            self.output_sink.metrics = Ingestion_Metrics()
+            self.output_sink = Queue_Sink(self.output_sink, pipeline_queue_size, self.metrics)
+
+    def ingest_file(self, filename, parsed_file=None):
+        # returns the duration, or None if the file didn't change since the last import
+        # parsed_file is (root, stage durations) if the file was already parsed by the parse stage of ingest_files_pipelined
+        source_file = NeTEx_Source().get_source_file(filename)
+        self.metrics.start_file(source_file)
+        # the source file of a member of a zip archive can contain directories
+        profile_name = source_file.replace('/', '_')
+
+        try:
+            if self.profiler == 'cprofile':
+                profile = cProfile.Profile()
+                duration = profile.runcall(self.read_and_insert_file, filename, source_file, parsed_file)
+                profile.dump_stats(f'{self.profile_path}/{profile_name}.prof')
+            elif self.profiler == 'pyinstrument':
+                # optional dependency, only needed for profiling
+                from pyinstrument import Profiler
+
+                profile = Profiler()
+                profile.start()
+                duration = self.read_and_insert_file(filename, source_file, parsed_file)
+                profile.stop()
+                with open(f'{self.profile_path}/{profile_name}.html', 'w') as file:
+                    file.write(profile.output_html())
+            else:
+                duration = self.read_and_insert_file(filename, source_file, parsed_file)
+        finally:
+            self.metrics.end_file()
+
+        return duration
+
+
+    def read_and_insert_file(self, filename, source_file, parsed_file=None):
+        start = time.perf_counter()
+
+        if self.incremental:
+            with self.metrics.stage('hash'):
+                content_hash = NeTEx_Source().get_content_hash(filename)
+            # a file that was ingested with a table selection has to be ingested again with another selection
+            if self.schema_plan.selected_table_names != None:
+                content_hash = f'{content_hash}:{",".join(self.schema_plan.selected_table_names)}'
+            if self.output_sink.get_content_hash(source_file) == content_hash:
+                return None
+
+        # the partitions of the file are created before its transaction starts, in their own transactions (see Database_Handler.create_partition)
+        self.output_sink.create_partitions(source_file, self.table_names)
+
+        # every file is inserted in a transaction (savepoint), a failed file doesn't leave any rows behind
+        with self.output_sink.file_transaction():
+            if self.incremental:
+                # all rows of the previous version of the file get replaced
+                with self.metrics.stage('delete'):
+                    self.output_sink.delete_source_file_rows(source_file, self.table_names)
+
+            if self.stream:
+                netex_stream_reader = NeTEx_Stream_Reader(
+                    self.schema_plan.schema, self.schema_plan.simplified_schema_graph, self.output_sink, self.batch_size, self.schema_plan.dispatch_tables,
+                    source_file, self.incremental, self.metrics, self.ancestor_ids
+                )
+                # parsing, reading and inserting happen interleaved, the inserts are also measured on their own ('encode', 'copy', 'upsert', 'write', ...)
+                with self.metrics.stage('stream'):
+                    netex_stream_reader.read(filename, remove_namespaces=not self.keep_namespaces)
+            else:
+                # the cpu time of a file that was parsed by the parse stage isn't part of the cpu time of this thread
+                is_parsed_in_other_thread = parsed_file != None
+                if parsed_file == None:
+                    parsed_file = self.parse_file(filename)
+                root, stage_durations = parsed_file
+                for stage_name, (wall_seconds, cpu_seconds) in stage_durations.items():
+                    self.metrics.add_stage_time(stage_name, wall_seconds, cpu_seconds)
+                    if is_parsed_in_other_thread:
+                        self.metrics.current_file['cpu_seconds'] += cpu_seconds
+
+                netex_file_reader = NeTEx_File_Reader(
+                    self.schema_plan.schema, self.schema_plan.simplified_schema_graph, self.schema_plan.dispatch_tables, self.metrics, self.ancestor_ids
+                )
+                with self.metrics.stage('query_node'):
+                    netex_file_reader.query_node(root, 'PublicationDelivery', None, None)
+                netex_file_reader.reproject_geometries()
+
+                for table_name, table_rows in netex_file_reader.results.items():
+                    self.output_sink.insert(table_name, table_rows, source_file, self.incremental)
+
+            # the manifest is part of the same transaction as the rows
+            if self.incremental:
+                self.output_sink.update_manifest(source_file, content_hash)
+
+        return time.perf_counter() - start
+
+
+    def parse_file(self, filename):
+        # returns the root element and the durations of the stages (stage name -> (wall seconds, cpu seconds of the thread))
+        # the durations are returned instead of measured with the metrics, because the parse stage of ingest_files_pipelined runs ahead of the current file
+        xml_handler = XML_Handler()
+        stage_durations = {}
+
+        start = (time.perf_counter(), time.thread_time())
+        root = xml_handler.parse(filename, True)
+        stage_durations['xml_parse'] = (time.perf_counter() - start[0], time.thread_time() - start[1])
+
+        if not self.keep_namespaces:
+            start = (time.perf_counter(), time.thread_time())
+            xml_handler.remove_namespaces(root)
+            stage_durations['remove_namespaces'] = (time.perf_counter() - start[0], time.thread_time() - start[1])
+
+        return root, stage_durations
+
+
+    def ingest_files(self, filenames, workers=1):
+        # yields (filename, duration) in the order of the filenames, also if the files are processed in parallel
+        if self.incremental:
+            self.output_sink.create_manifest_table(self.table_names)
+
+        if self.pipeline_queue_size != None:
+            yield from self.ingest_files_pipelined(filenames)
+        elif workers <= 1:
+            try:
+                for filename in filenames:
+                    yield filename, self.ingest_file(filename)
+            finally:
+                # commits the last files
+                self.output_sink.close()
+        else:
+            # a file is reported as soon as its worker returns it, for this reason it has to be committed at that point
+            # with commit_size > 1 the files of the other workers would be rolled back, if a file fails and the pool gets terminated
+            if self.commit_size > 1:
+                raise Exception('commit_size > 1 is not supported with multiple workers')
+
+            close_barrier = multiprocessing.Barrier(workers)
+            with multiprocessing.Pool(
+                workers, initializer=init_worker,
+                initargs=(
+                    self.schema_plan, self.db_connection_url, self.stream, self.batch_size, self.incremental, self.profiler, self.profile_path, self.commit_size,
+                    self.table_suffix, self.parquet_path, self.keep_namespaces, self.ancestor_ids, close_barrier
+                )
+            ) as pool:
+                # chunksize 1, because the file sizes vary a lot and a single big file shouldn't block a chunk of small files
+                for filename, duration, file_metrics in pool.imap(ingest_file_in_worker, filenames, chunksize=1):
+                    self.metrics.add_file(file_metrics)
+                    yield filename, duration
+
+                # every worker closes its output sink (example: writes the last row groups of the parquet sink) in one task
+                # unlike in a finalizer of the worker process, an exception of the close is raised here
+                pool.map(close_worker, range(workers), chunksize=1)
+                pool.close()
+                pool.join()
+
+
+    def ingest_files_pipelined(self, filenames):
+        # three concurrent stages, connected by bounded queues:
+        # - parse: parses the next files in a thread (lxml releases the gil while parsing), not used with stream, because the stream reader parses while reading
+        # - read: creates the rows of the files in the calling thread
+        # - load: writes the rows in the thread of Queue_Sink
+        # a full queue blocks the stage before it (backpressure), so at most pipeline_queue_size parsed files and batches of rows are held in memory
+        # the files are yielded when the load stage committed them, for this reason every file has to be committed on its own
+        if self.commit_size > 1:
+            raise Exception('commit_size > 1 is not supported with the pipeline')
+
+        filenames = list(filenames)
+        parsed_files = queue.Queue(self.pipeline_queue_size)
+        stop_parsing = threading.Event()
+
+        def parse_files():
+            for filename in filenames:
+                if stop_parsing.is_set():
+                    return
+                try:
+                    parsed_file = self.parse_file(filename)
+                except Exception as exception:
+                    # the exception is raised by the read stage, when it reaches the file
+                    parsed_file = exception
+                parsed_files.put((filename, parsed_file))
+
+        if not self.stream:
+            parse_thread = threading.Thread(target=parse_files, name='parse stage', daemon=True)
+            parse_thread.start()
+
+        # files whose rows are read, but not committed yet: (filename, start time)
+        loading_files = collections.deque()
+
+        def get_committed_files():
+            # the duration of a file is the time from the start of reading until the commit of the load stage
+            for commit_time in self.output_sink.get_committed_files():
+                filename, start = loading_files.popleft()
+                yield filename, commit_time - start
+
+        try:
+            for filename in filenames:
+                parsed_file = None
+                if not self.stream:
+                    filename, parsed_file = parsed_files.get()
+                    if isinstance(parsed_file, Exception):
+                        raise parsed_file
+
+                loading_files.append((filename, time.perf_counter()))
+                self.ingest_file(filename, parsed_file)
+                yield from get_committed_files()
+
+            # waits until the load stage wrote all rows, raises the exception of the load stage if it failed
+            self.output_sink.close()
+            yield from get_committed_files()
+        finally:
+            if not self.stream:
+                stop_parsing.set()
+                # the parse stage can be blocked by a full queue
+                while parse_thread.is_alive():
+                    try:
+                        parsed_files.get(timeout=1)
+                    except queue.Empty:
+                        pass
+
+            # stops the load stage, also if a file failed
+            self.output_sink.close()
+
+
+# every process of the pool has its own ingestor with its own database connection
+worker_ingestor = None
+worker_close_barrier = None
+
+def init_worker(
+    schema_plan, db_connection_url, stream, batch_size, incremental, profiler, profile_path, commit_size, table_suffix, parquet_path, keep_namespaces, ancestor_ids,
+    close_barrier
+):
+    global worker_ingestor, worker_close_barrier
+    worker_ingestor = NeTEx_Ingestor(
+        schema_plan, db_connection_url, stream, batch_size, incremental, profiler, profile_path, commit_size, table_suffix, parquet_path,
+        keep_namespaces=keep_namespaces, ancestor_ids=ancestor_ids
+    )
+    worker_close_barrier = close_barrier
+
+def close_worker(_):
+    # every worker takes exactly one close task, because it waits until all workers took one
+    # the barrier is also passed if the close fails, otherwise the other workers would wait forever
+    try:
+        worker_ingestor.output_sink.close()
+    finally:
+        worker_close_barrier.wait()
+
+def ingest_file_in_worker(filename):
+    duration = worker_ingestor.ingest_file(filename)
+    # the metrics of the file are sent to the main process
+    return filename, duration, worker_ingestor.metrics.files.pop()
\ No newline at end of file
@@ -0,0 +1,101 @@
+import contextlib
+import zipfile
+import hashlib
+import fnmatch
+import gzip
+import os
+
+# members of zip archives are addressed as '<archive>.zip!<member>', example: '../rb_norway-aggregated-netex.zip!_RUT_shared_data.xml'
+# like this they can be passed around (example: to the worker processes) like the names of extracted files
+archive_separator = '!'
+compression_extensions = ['.gz', '.zst']
+
+# opened zip archives per process and path, so that the central directory of an archive with thousands of members is only read once
+# the process id is part of the key, because forked worker processes must not share the file position of the parent's file
+zip_files = {}
+
+
+class NeTEx_Source:
+    # reads NeTEx files from directories, zip archives (every member is a file) and gzip or zstandard compressed files, without extracting them
+
+    def get_filenames(self, netex_path, pattern='*'):
+        # returns the sorted names of the NeTEx files in netex_path (directory, zip archive or single file) which match the glob pattern
+        # the pattern is matched against the member path in zip archives and against the name without compression extension otherwise
+        # examples: '*.xml', '_RUT_*', 'rb_norway-aggregated-netex/*shared_data*'
+        if os.path.isdir(netex_path):
+            filenames = [f'{netex_path}/{file}' for file in os.listdir(netex_path) if os.path.isfile(f'{netex_path}/{file}')]
+            return sorted(filename for filename in filenames if fnmatch.fnmatch(self.get_source_file(filename), pattern))
+        elif netex_path.endswith('.zip'):
+            member_names = [info.filename for info in self.get_zip_file(netex_path).infolist() if not info.is_dir()]
+            return [f'{netex_path}{archive_separator}{member_name}' for member_name in sorted(member_names) if fnmatch.fnmatch(member_name, pattern)]
+        else:
+            return [netex_path]
+
+
+    def get_source_file(self, filename):
+        # name of the file in the column source_file, without compression extension
+        # files and compressed files use their name without directories, members of zip archives their path inside of the archive
+        # otherwise members with the same name in different directories of an archive would replace each other's rows (partition, manifest, incremental)
+        # like this the rows of a file keep their source_file, regardless of whether it was read extracted, compressed or from the root of an archive
+        archive_path, member_name = self.split_filename(filename)
+        source_file = member_name if member_name != None else os.path.basename(archive_path)
+
+        for extension in compression_extensions:
+            if source_file.endswith(extension):
+                return source_file[:-len(extension)]
+        return source_file
+
+
+    @contextlib.contextmanager
+    def open(self, filename):
+        # yields the binary stream of the decompressed file
+        # uncompressed files yield their path, lxml reads them faster itself than through a python file object
+        archive_path, member_name = self.split_filename(filename)
+
+        if member_name != None:
+            with self.get_zip_file(archive_path).open(member_name) as file:
+                yield file
+        elif filename.endswith('.gz'):
+            with gzip.open(filename, 'rb') as file:
+                yield file
+        elif filename.endswith('.zst'):
+            # optional dependency, only needed for zstandard compressed files
+            import zstandard
+
+            with open(filename, 'rb') as compressed_file:
+                with zstandard.ZstdDecompressor().stream_reader(compressed_file) as file:
+                    yield file
+        else:
+            yield filename
+
+
+    def get_content_hash(self, filename):
+        # members of zip archives use the crc32 and the size of the central directory, so that unchanged members don't have to be decompressed
+        # other files use the sha256 of their (compressed) content
+        archive_path, member_name = self.split_filename(filename)
+
+        if member_name != None:
+            info = self.get_zip_file(archive_path).getinfo(member_name)
+            return f'crc32:{info.CRC:08x}:{info.file_size}'
+
+        file_hash = hashlib.sha256()
+        with open(filename, 'rb') as file:
+            for chunk in iter(lambda: file.read(1024 * 1024), b''):
+                file_hash.update(chunk)
+
+        return file_hash.hexdigest()
+
+
+    def split_filename(self, filename):
+        # returns (archive path, member name) for members of zip archives and (filename, None) otherwise
+        archive_path, separator, member_name = filename.partition(f'.zip{archive_separator}')
+        if separator == '':
+            return filename, None
+        return f'{archive_path}.zip', member_name
+
+
+    def get_zip_file(self, archive_path):
+        key = (os.getpid(), archive_path)
+        if key not in zip_files:
+            zip_files[key] = zipfile.ZipFile(archive_path)
+        return zip_files[key]
@@ -0,0 +1,115 @@
+import uuid
+
+from XML_Handler import XML_Handler
+from NeTEx_File_Reader import NeTEx_File_Reader
+from shared import local_name
+
+
+class NeTEx_Stream_Reader(NeTEx_File_Reader):
+    def __init__(
+        self, schema, simplified_schema_graph, output_sink, batch_size=50000, dispatch_tables=None, source_file=None, upsert=False, metrics=None, ancestor_ids=False
+    ):
+        super().__init__(schema, simplified_schema_graph, dispatch_tables, metrics, ancestor_ids)
+        # Database_Handler or another Output_Sink
+        self.output_sink = output_sink
+        self.batch_size = batch_size
+        self.source_file = source_file
+        self.upsert = upsert
+        self.row_count = 0
+
+
+    def read(self, filename, huge_tree=True, remove_namespaces=True):
+        # table elements which are currently open: (xml element, simplified schema node id, node id, ids from the root to the element)
+        # unlike query_node, the rows aren't created top down, but when the table element closes
+        # at that point all child tables of the element are already added to the results and removed from the xml tree
+        open_table_elements = []
+
+        for event, element in XML_Handler().iterparse(filename, huge_tree, remove_namespaces):
+            if event == 'start':
+                simplified_schema_node_id = self.get_table_node_id(element, open_table_elements)
+
+                if simplified_schema_node_id != None:
+                    # tables that aren't part of the schema (see the table selection of Schema_Plan) get the node id None and don't create rows
+                    # they still have to be tracked, so that their elements get removed from the xml tree
+                    node_id = None
+                    if local_name(element.tag) in self.table_names:
+                        node_id = element.get('id')
+                        if node_id == None:
+                            node_id = str(uuid.uuid4())
+
+                    # the ids are only collected with ancestor_ids, the rows of child tables get the list of their parent element
+                    path_ids = None
+                    if self.with_ancestor_ids:
+                        path_ids = open_table_elements[-1][3] if len(open_table_elements) > 0 else []
+                        if node_id != None:
+                            path_ids = path_ids + [node_id]
+
+                    open_table_elements.append((element, simplified_schema_node_id, node_id, path_ids))
+            elif len(open_table_elements) > 0 and open_table_elements[-1][0] is element:
+                _, simplified_schema_node_id, node_id, _ = open_table_elements.pop()
+
+                if node_id != None:
+                    parent_node_tag = None
+                    parent_node_id = None
+                    ancestor_ids = None
+                    if len(open_table_elements) > 0:
+                        parent_element, _, parent_node_id, ancestor_ids = open_table_elements[-1]
+                        parent_node_tag = local_name(parent_element.tag)
+
+                    self.add_row(element, simplified_schema_node_id, parent_node_tag, parent_node_id, node_id, ancestor_ids)
+                    self.row_count += 1
+
+                # free the memory of the processed element and of its already processed siblings
+                # the element itself stays in the tree (without content), so that the parent element still knows that it contains a separate table
+                element.clear()
+                parent = element.getparent()
+                if parent != None:
+                    while element.getprevious() != None:
+                        del parent[0]
+
+                if self.row_count >= self.batch_size:
+                    self.flush()
+
+        self.flush()
+
+
+    def get_table_node_id(self, element, open_table_elements):
+        # returns the simplified schema node id, if the element belongs to a separate table
+        # the root element (PublicationDelivery) is the first table
+        if len(open_table_elements) == 0:
+            if element.getparent() == None and local_name(element.tag) in self.schema.keys():
+                return local_name(element.tag)
+            return None
+
+        # same rule as in add_row: a table element is the child of a child element of the parent table
+        # example: table 'StopPlace', child: 'quays', child of child: 'Quay' (table element)
+        parent = element.getparent()
+        parent_table_element, parent_simplified_schema_node_id, _, _ = open_table_elements[-1]
+        if parent == None or parent.getparent() is not parent_table_element:
+            return None
+
+        child_node = self.dispatch_tables[parent_simplified_schema_node_id].get(parent.tag)
+        if child_node == None:
+            return None
+
+        child_of_child_node = self.dispatch_tables[child_node[2]].get(element.tag)
+        if child_of_child_node == None or not child_of_child_node[3]:
+            return None
+
+        return child_of_child_node[2]
+
+
+    def query_child_table(self, node, simplified_schema_node_id, parent_node_tag, parent_node_id, ancestor_ids=None):
+        # the rows of child tables are already created, when their element closed
+        pass
+
+
+    def flush(self):
+        self.reproject_geometries()
+
+        for table_name, table_rows in self.results.items():
+            if len(table_rows) > 0:
+                self.output_sink.insert(table_name, table_rows, self.source_file, self.upsert)
+
+        self.results = self.create_results()
+        self.row_count = 0
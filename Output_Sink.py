@@ -0,0 +1,28 @@
+import abc
+
+
+class Output_Sink(abc.ABC):
+    # interface for the targets of the rows created by NeTEx_File_Reader and NeTEx_Stream_Reader
+    # implementations: Database_Handler (PostgreSQL), Parquet_Sink (one parquet dataset per table) and Queue_Sink (passes the rows to another sink in a thread)
+
+    @abc.abstractmethod
+    def insert(self, table_name, table_rows, source_file=None, upsert=False):
+        # table_rows is a list of dicts or a Column_Store
+        pass
+
+
+    @abc.abstractmethod
+    def file_transaction(self):
+        # context manager (contextlib.contextmanager)
+        # all rows of a file that are inserted inside of the context have to be written completely or not at all
+        pass
+
+
+    def create_partitions(self, source_file, table_names):
+        # creates the storage of the rows of a file before its file transaction starts, only needed by Database_Handler
+        pass
+
+
+    def close(self):
+        # writes everything that isn't written yet
+        pass
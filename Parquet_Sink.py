@@ -0,0 +1,203 @@
+from sqlalchemy import ARRAY, BigInteger, Integer, Float, Numeric, Boolean, Date, Time, DateTime
+from sqlalchemy.dialects.postgresql import JSONB
+from geoalchemy2.types import Geometry
+import pyarrow as pa
+import pyarrow.parquet as pq
+import numpy as np
+import shapely
+import contextlib
+import uuid
+import os
+
+from Output_Sink import Output_Sink
+from Column_Store import Column_Store
+from JSON_Encoder import JSON_Encoder
+from Ingestion_Metrics import Ingestion_Metrics
+from shared import camel_to_snake
+
+
+class Parquet_Sink(Output_Sink):
+    def __init__(self, output_path, schema, row_group_size=100000, metrics=None):
+        # every table is written to its own dataset: '<output_path>/<table name>/part-<random id>.parquet'
+        # every sink (example: every worker process) writes its own file, so the files of parallel sinks don't collide
+        self.output_path = output_path
+        self.row_group_size = row_group_size
+        self.metrics = metrics if metrics != None else Ingestion_Metrics()
+        self.part_name = f'part-{uuid.uuid4().hex}.parquet'
+        # dicts are written as json text, like in the jsonb columns of the database
+        self.json_encoder = JSON_Encoder()
+
+        # table name -> arrow schema with the column types of the schema
+        self.arrow_schemas = {}
+        for table_name, columns in schema.items():
+            self.arrow_schemas[camel_to_snake(table_name)] = pa.schema([
+                (camel_to_snake(column_name), self.get_arrow_type(column['column_type'])) for column_name, column in columns.items()
+            ])
+
+        # table name -> parquet writer, created with the first rows of the table
+        self.writers = {}
+        # table name -> arrow tables which aren't written yet, they are written as one row group as soon as they have row_group_size rows
+        self.pending_tables = {}
+        self.pending_row_counts = {}
+        # the rows of the file in the current file transaction, they are only added to the datasets if the file is complete:
+        # table name -> arrow tables of the file which aren't written yet
+        self.file_tables = None
+        self.file_row_counts = {}
+        # table name -> (path, parquet writer) of a temporary part of the file, used as soon as the file has row_group_size rows of the table
+        # like this the memory usage doesn't depend on the file size (see --stream), small files still share the part of the sink
+        self.file_parts = {}
+
+    def get_arrow_type(self, column_type):
+        if isinstance(column_type, ARRAY):
+            return pa.list_(pa.string())
+
+        # the column types are classes or instances of the classes
+        column_class = column_type if isinstance(column_type, type) else type(column_type)
+
+        # geometries are written as wkb, json as text
+        # the subclasses have to be checked first (BigInteger is a subclass of Integer and Float a subclass of Numeric)
+        for sqlalchemy_type, arrow_type in [
+            (Geometry, pa.binary()), (JSONB, pa.string()), (BigInteger, pa.int64()), (Integer, pa.int32()), (Float, pa.float64()), (Numeric, pa.float64()),
+            (Boolean, pa.bool_()), (Date, pa.date32()), (Time, pa.time64('us')), (DateTime, pa.timestamp('us'))
+        ]:
+            if issubclass(column_class, sqlalchemy_type):
+                return arrow_type
+        return pa.string()
+
+
+    def insert(self, table_name, table_rows, source_file=None, upsert=False):
+        # upsert isn't supported, the rows are always appended
+        if len(table_rows) == 0:
+            return
+
+        arrow_schema = self.arrow_schemas[table_name]
+
+        with self.metrics.stage('encode'):
+            arrays = []
+            for field in arrow_schema:
+                if field.name == 'source_file':
+                    values = [source_file] * len(table_rows)
+                elif isinstance(table_rows, Column_Store):
+                    values = table_rows.columns.get(field.name, [None] * len(table_rows))
+                else:
+                    values = [row.get(field.name) for row in table_rows]
+
+                arrays.append(self.values_to_array(values, field.type))
+
+            table = pa.Table.from_arrays(arrays, schema=arrow_schema)
+
+        self.metrics.add_table_rows(table_name, table.num_rows, table.nbytes)
+
+        if self.file_tables != None:
+            self.add_file_table(table_name, table)
+        else:
+            self.add_pending_table(table_name, table)
+
+
+    @contextlib.contextmanager
+    def file_transaction(self):
+        # the rows of a failed file are dropped and its temporary parts are deleted
+        self.file_tables = {}
+        self.file_row_counts = {}
+        self.file_parts = {}
+
+        try:
+            yield
+        except BaseException:
+            for path, writer in self.file_parts.values():
+                writer.close()
+                os.remove(path)
+            self.file_tables = None
+            self.file_parts = {}
+            raise
+
+        file_tables = self.file_tables
+        self.file_tables = None
+        for table_name, (path, writer) in self.file_parts.items():
+            with self.metrics.stage('write'):
+                if table_name in file_tables:
+                    writer.write_table(pa.concat_tables(file_tables.pop(table_name)), row_group_size=self.row_group_size)
+                writer.close()
+                # renaming the complete part adds it to the dataset
+                os.rename(path, f'{self.output_path}/{table_name}/part-{uuid.uuid4().hex}.parquet')
+        self.file_parts = {}
+
+        for table_name, tables in file_tables.items():
+            for table in tables:
+                self.add_pending_table(table_name, table)
+
+
+    def add_file_table(self, table_name, table):
+        self.file_tables.setdefault(table_name, []).append(table)
+        self.file_row_counts[table_name] = self.file_row_counts.get(table_name, 0) + table.num_rows
+
+        if self.file_row_counts[table_name] >= self.row_group_size:
+            with self.metrics.stage('write'):
+                if table_name not in self.file_parts:
+                    os.makedirs(f'{self.output_path}/{table_name}', exist_ok=True)
+                    # the name starts with a dot, so that the readers of the dataset ignore the part until it's complete
+                    path = f'{self.output_path}/{table_name}/.part-{uuid.uuid4().hex}.parquet.tmp'
+                    self.file_parts[table_name] = (path, pq.ParquetWriter(path, self.arrow_schemas[table_name]))
+
+                self.file_parts[table_name][1].write_table(pa.concat_tables(self.file_tables.pop(table_name)), row_group_size=self.row_group_size)
+            self.file_row_counts[table_name] = 0
+
+
+    def add_pending_table(self, table_name, table):
+        self.pending_tables.setdefault(table_name, []).append(table)
+        self.pending_row_counts[table_name] = self.pending_row_counts.get(table_name, 0) + table.num_rows
+
+        if self.pending_row_counts[table_name] >= self.row_group_size:
+            self.write_pending_tables(table_name)
+
+
+    def values_to_array(self, values, arrow_type):
+        if arrow_type == pa.binary():
+            # all geometries of the column are transformed to wkb with a single call
+            return pa.array(shapely.to_wkb(np.array(values, dtype=object)), type=arrow_type)
+        elif arrow_type == pa.string():
+            # the dicts of the column are encoded together
+            return pa.array([self.value_to_text(value) for value in self.json_encoder.encode_values(values)], type=arrow_type)
+        elif pa.types.is_list(arrow_type):
+            return pa.array([None if value == None else [self.value_to_text(item) for item in value] for value in values], type=arrow_type)
+        elif pa.types.is_floating(arrow_type):
+            # decimal values (xsd:decimal) are written as double
+            return pa.array([None if value == None else float(value) for value in values], type=arrow_type)
+        elif pa.types.is_time(arrow_type):
+            # the time zone of a time (example: '10:00:00Z') is ignored, like in the time columns of the database
+            return pa.array([None if value == None else value.replace(tzinfo=None) for value in values], type=arrow_type)
+        else:
+            return pa.array(values, type=arrow_type)
+
+
+    def value_to_text(self, value):
+        if value == None or isinstance(value, str):
+            return value
+        elif isinstance(value, dict):
+            return self.json_encoder.encode(value)
+        return str(value)
+
+
+    def write_pending_tables(self, table_name):
+        if len(self.pending_tables.get(table_name, [])) == 0:
+            return
+
+        with self.metrics.stage('write'):
+            if table_name not in self.writers:
+                os.makedirs(f'{self.output_path}/{table_name}', exist_ok=True)
+                self.writers[table_name] = pq.ParquetWriter(f'{self.output_path}/{table_name}/{self.part_name}', self.arrow_schemas[table_name])
+
+            table = pa.concat_tables(self.pending_tables[table_name])
+            self.writers[table_name].write_table(table, row_group_size=self.row_group_size)
+
+        self.pending_tables[table_name] = []
+        self.pending_row_counts[table_name] = 0
+
+
+    def close(self):
+        for table_name in list(self.pending_tables.keys()):
+            self.write_pending_tables(table_name)
+
+        for writer in self.writers.values():
+            writer.close()
+        self.writers = {}
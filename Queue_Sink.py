@@ -0,0 +1,122 @@
+import contextlib
+import threading
+import queue
+import time
+
+from Output_Sink import Output_Sink
+
+
+class Queue_Sink(Output_Sink):
+    def __init__(self, output_sink, queue_size=4, metrics=None):
+        # passes the inserts through a bounded queue to another output sink, which writes them in its own thread (the load stage)
+        # like this the rows of the next batch or file are created while the previous ones are written (psycopg2 and pyarrow release the gil while writing)
+        # if the queue is full, insert blocks until the load stage caught up (backpressure), so the memory usage is limited to queue_size batches
+        self.output_sink = output_sink
+        self.queue = queue.Queue(queue_size)
+        # the metrics of the load stage are measured by the metrics of the output sink and merged into these metrics per file
+        self.metrics = metrics
+        # first exception of the load stage, it is raised in the thread of the caller by the next call
+        self.error = None
+        # times (time.perf_counter) at which the load stage committed the files, in the order of the files, see get_committed_files
+        self.committed_files = queue.Queue()
+
+        self.thread = threading.Thread(target=self.load, name='load stage', daemon=True)
+        self.thread.start()
+
+    def insert(self, table_name, table_rows, source_file=None, upsert=False):
+        # the rows must not be changed after the call, NeTEx_File_Reader and NeTEx_Stream_Reader create new results after handing them over
+        self.put(('insert', (table_name, table_rows, source_file, upsert)))
+
+
+    def create_partitions(self, source_file, table_names):
+        self.put(('create_partitions', (source_file, table_names)))
+
+
+    @contextlib.contextmanager
+    def file_transaction(self):
+        # the begin and the end of the transaction are passed through the queue, so that the load stage opens and closes it between the inserts of the file
+        source_file = self.metrics.current_file['source_file'] if self.metrics != None else None
+        self.put(('begin', source_file))
+
+        try:
+            yield
+        except BaseException as exception:
+            # the rows of the file that were already written are rolled back by the load stage
+            self.put(('rollback', exception))
+            raise
+
+        self.put(('commit', None))
+
+
+    def put(self, item):
+        # checks regularly if the load stage failed, otherwise a full queue would block forever
+        while True:
+            if self.error != None:
+                raise self.error
+
+            try:
+                self.queue.put(item, timeout=1)
+                return
+            except queue.Full:
+                pass
+
+
+    def load(self):
+        transaction = None
+
+        try:
+            while True:
+                action, value = self.queue.get()
+
+                if action == 'insert':
+                    self.output_sink.insert(*value)
+                elif action == 'create_partitions':
+                    self.output_sink.create_partitions(*value)
+                elif action == 'begin':
+                    if self.metrics != None:
+                        self.output_sink.metrics.start_file(value)
+                    transaction = self.output_sink.file_transaction()
+                    transaction.__enter__()
+                elif action in ['commit', 'rollback']:
+                    if action == 'commit':
+                        transaction.__exit__(None, None, None)
+                        self.committed_files.put(time.perf_counter())
+                    else:
+                        # the exception of the file is raised by the caller, file_transaction only rolls back
+                        transaction.__exit__(type(value), value, value.__traceback__)
+                    transaction = None
+
+                    if self.metrics != None:
+                        self.metrics.merge_file(self.output_sink.metrics.end_file())
+                        self.output_sink.metrics.files.pop()
+                elif action == 'close':
+                    self.output_sink.close()
+                    return
+        except BaseException as exception:
+            self.error = exception
+
+            # the open transaction of the failed file is rolled back
+            if transaction != None:
+                with contextlib.suppress(Exception):
+                    transaction.__exit__(type(exception), exception, exception.__traceback__)
+
+
+    def get_committed_files(self):
+        # returns the commit times of the files that were committed by the load stage since the last call
+        # a file is only complete at this point, file_transaction already returns when the commit is queued
+        commit_times = []
+        while True:
+            try:
+                commit_times.append(self.committed_files.get_nowait())
+            except queue.Empty:
+                return commit_times
+
+
+    def close(self):
+        # waits until all inserts are written
+        if self.thread.is_alive():
+            self.put(('close', None))
+            self.thread.join()
+
+        if self.error != None:
+            raise self.error
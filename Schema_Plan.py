@@ -0,0 +1,117 @@
+import hashlib
+import pickle
+import time
+import os
+
+from XML_Schema_Graph_Builder import XML_Schema_Graph_Builder
+from Simplified_Schema_Graph_Builder import Simplified_Schema_Graph_Builder
+from Final_Schema_Builder import Final_Schema_Builder
+from Dispatch_Table_Builder import Dispatch_Table_Builder
+
+# has to be increased every time the schema builders produce a different result, so that existing schema plans get rebuilt
+schema_plan_version = 8
+
+
+class Schema_Plan:
+    def __init__(self, xsd_netex_path, cache_path=None, workers=None, selected_table_names=None):
+        self.xsd_netex_path = xsd_netex_path
+        # only the selected tables and their ancestors are part of the schema, None selects all tables (see Final_Schema_Builder)
+        self.selected_table_names = sorted(selected_table_names) if selected_table_names != None else None
+
+        # every table selection has its own cache file
+        if cache_path == None:
+            if self.selected_table_names == None:
+                cache_path = 'schema_plan.pickle'
+            else:
+                cache_path = f'schema_plan_{hashlib.sha1(",".join(self.selected_table_names).encode()).hexdigest()[:12]}.pickle'
+        self.cache_path = cache_path
+        # number of processes that parse the xsd files, None uses all cores
+        self.workers = workers
+        # duration of each phase of the last build in seconds
+        self.timings = {}
+        self.simplified_schema_graph = None
+        self.schema = None
+        self.dispatch_tables = None
+
+    def load(self):
+        # building the schema from the xsd files takes a long time, for this reason the result is cached
+        # the cache is only valid for the same xsd files and the same version of the schema builders
+        xsd_hash = self.hash_xsd_files()
+
+        if os.path.exists(self.cache_path):
+            with open(self.cache_path, 'rb') as file:
+                schema_plan = pickle.load(file)
+
+            if (
+                schema_plan['version'] == schema_plan_version and schema_plan['xsd_hash'] == xsd_hash and
+                schema_plan['selected_table_names'] == self.selected_table_names
+            ):
+                self.simplified_schema_graph = schema_plan['simplified_schema_graph']
+                self.schema = schema_plan['schema']
+                self.dispatch_tables = schema_plan['dispatch_tables']
+                return self
+
+        self.build()
+        self.save(xsd_hash)
+
+        return self
+
+
+    def build(self):
+        xml_schema_graph_builder = XML_Schema_Graph_Builder()
+        xml_schema_graph_builder.create_graph(self.xsd_netex_path, self.workers)
+        self.timings = {f'xml_schema_graph_{phase}': duration for phase, duration in xml_schema_graph_builder.timings.items()}
+
+        start = time.perf_counter()
+        simplified_schema_graph_builder = Simplified_Schema_Graph_Builder(xml_schema_graph_builder.graph)
+        simplified_schema_graph_builder.create_graph('PublicationDelivery', 'PublicationDelivery')
+        self.timings['simplified_schema_graph'] = time.perf_counter() - start
+
+        start = time.perf_counter()
+        final_schema_builder = Final_Schema_Builder(simplified_schema_graph_builder.graph, self.selected_table_names)
+        final_schema_builder.create_schema('PublicationDelivery', None, set())
+        self.timings['final_schema'] = time.perf_counter() - start
+
+        self.simplified_schema_graph = simplified_schema_graph_builder.graph
+        self.schema = final_schema_builder.schema
+
+        start = time.perf_counter()
+        dispatch_table_builder = Dispatch_Table_Builder(self.simplified_schema_graph, self.schema)
+        dispatch_table_builder.create_dispatch_tables()
+        self.dispatch_tables = dispatch_table_builder.dispatch_tables
+        self.timings['dispatch_tables'] = time.perf_counter() - start
+
+        print('schema plan built: ' + ', '.join(f'{phase} {duration:.2f} s' for phase, duration in self.timings.items()))
+
+
+    def save(self, xsd_hash):
+        schema_plan = {
+            'version': schema_plan_version,
+            'xsd_hash': xsd_hash,
+            'selected_table_names': self.selected_table_names,
+            'simplified_schema_graph': self.simplified_schema_graph,
+            'schema': self.schema,
+            'dispatch_tables': self.dispatch_tables
+        }
+
+        # write to a temporary file first, so that a running process never reads a half written schema plan
+        temporary_cache_path = f'{self.cache_path}.{os.getpid()}.tmp'
+        with open(temporary_cache_path, 'wb') as file:
+            pickle.dump(schema_plan, file, protocol=pickle.HIGHEST_PROTOCOL)
+        os.replace(temporary_cache_path, self.cache_path)
+
+
+    def hash_xsd_files(self):
+        xsd_hash = hashlib.sha256()
+
+        for route, folders, files in os.walk(self.xsd_netex_path):
+            # os.walk doesn't guarantee an order, but the hash should be the same for the same files
+            folders.sort()
+            for file in sorted(files):
+                if file.endswith('.xsd'):
+                    filename = f'{route}/{file}'
+                    xsd_hash.update(os.path.relpath(filename, self.xsd_netex_path).encode())
+                    with open(filename, 'rb') as xsd_file:
+                        xsd_hash.update(xsd_file.read())
+
+        return xsd_hash.hexdigest()
\ No newline at end of file
@@ -1,11 +1,20 @@
 import networkx as nx
 
+from shared import run_iteratively
+
 class Simplified_Schema_Graph_Builder:
     def __init__(self, schema_graph):
         self.graph = nx.DiGraph()
         self.schema_graph = schema_graph
+        # node id -> names of the child nodes in the simplified schema graph, so that the uniqueness of the names can be checked without going through the edges
+        self.child_names = {}
 
     def create_graph(self, node_id, graph_parent_node_id):
+        # the graph can be very deep, for this reason it's traversed with an explicit stack (see create_graph_generator)
+        run_iteratively(self.create_graph_generator(node_id, graph_parent_node_id))
+
+
+    def create_graph_generator(self, node_id, graph_parent_node_id):
         edges = list(self.schema_graph.edges(node_id, data=True))
         
         is_parent_node_abstract = False
@@ -29,10 +38,7 @@ class Simplified_Schema_Graph_Builder:
                 # if target node is already added to simplified_schema_graph, only a connection to the target node should be created
                 # this should prevent endless loops
                 if target_edge_node_id in self.graph.nodes:
-                    self.graph.add_edge(
-                        graph_parent_node_id,
-                        target_edge_node_id
-                    )
+                    self.add_edge(graph_parent_node_id, target_edge_node_id)
                     
                 # only proceed if target node is further specified in schema_graph. Otherwise informations are missing how to proceed with target node
                 # TODO: check why target node isn't further specified
@@ -41,7 +47,7 @@ class Simplified_Schema_Graph_Builder:
                     is_abstract = False
 
                     if 'ref' in target_edge_node.keys() and target_edge_node['ref'] != None:
-                        self.create_graph(target_edge_node_id, graph_parent_node_id)
+                        yield self.create_graph_generator(target_edge_node_id, graph_parent_node_id)
                         has_ref_attribute = True
 
                     if 'abstract' in target_edge_node.keys() and target_edge_node['abstract'] == 'true':
@@ -56,28 +62,51 @@ class Simplified_Schema_Graph_Builder:
                             # the node 'Operator' and the node 'CustomerServiceContactDetails' are connected with two edges
                             # both edges are describing the same connection but have different node ids for 'CustomerServiceContactDetails'
                         # The following code should ensure that a edges are always unique
-                        is_node_already_in_simplified_schema_graph = False
-                        if graph_parent_node_id in self.graph.nodes:
-                            parent_edges = self.graph.edges(graph_parent_node_id)
-                            parent_edge_target_names = [self.graph.nodes[parent_edge[1]]['name'] for parent_edge in parent_edges]
-                            
-                            if name in parent_edge_target_names:
-                                is_node_already_in_simplified_schema_graph = True
+                        is_node_already_in_simplified_schema_graph = name in self.child_names.get(graph_parent_node_id, ())
 
                         if not is_node_already_in_simplified_schema_graph:              
                             self.graph.add_node(
                                 target_edge_node_id,
                                 name = name,
                                 node_type = target_edge_node['node_type'],
-                                is_list = edge[2]['is_list']
+                                is_list = edge[2]['is_list'],
+                                content_type = self.get_xsd_type(target_edge_node_id, set())
                             )
 
-                            self.graph.add_edge(
-                                graph_parent_node_id,
-                                target_edge_node_id
-                            )
+                            self.add_edge(graph_parent_node_id, target_edge_node_id)
 
-                            self.create_graph(target_edge_node_id, target_edge_node_id)
+                            yield self.create_graph_generator(target_edge_node_id, target_edge_node_id)
 
                     if target_edge_node['node_type'] != 'element' or is_abstract:
-                        self.create_graph(target_edge_node_id, graph_parent_node_id)
\ No newline at end of file
+                        yield self.create_graph_generator(target_edge_node_id, graph_parent_node_id)
+
+
+    def add_edge(self, graph_parent_node_id, target_node_id):
+        self.graph.add_edge(graph_parent_node_id, target_node_id)
+        self.child_names.setdefault(graph_parent_node_id, set()).add(self.graph.nodes[target_node_id].get('name'))
+
+
+    def get_xsd_type(self, node_id, already_visited_node_ids):
+        # returns the xsd simple type (example: 'xsd:time') the text of an element is based on, or None if it isn't based on one
+        # the type is followed through the named types and their base types
+        # example: 'DepartureTime' -> 'TimeType' -> 'xsd:time'
+        while node_id not in already_visited_node_ids and node_id in self.schema_graph.nodes:
+            already_visited_node_ids.add(node_id)
+
+            node = self.schema_graph.nodes[node_id]
+            type = node.get('content_type') or node.get('base')
+
+            # anonymous simple type
+            # example: <xsd:element name="Priority"><xsd:simpleType><xsd:restriction base="xsd:integer"/></xsd:simpleType></xsd:element>
+            if type == None:
+                for edge in self.schema_graph.edges(node_id):
+                    if self.schema_graph.nodes[edge[1]].get('node_type') == 'simpleType':
+                        type = edge[1]
+
+            if type == None:
+                return None
+            elif type.startswith('xsd:'):
+                return type
+            node_id = type
+
+        return None
\ No newline at end of file
@@ -1,11 +1,25 @@
 from lxml import etree, objectify
 
+from NeTEx_Source import NeTEx_Source
+
 class XML_Handler:
-    def load(self, filename, huge_tree):
+    def load(self, filename, huge_tree, remove_namespaces=True):
+        # without removing the namespaces, the tree stays untouched and the elements have to be matched with their namespaces (see shared.get_tags)
+        # this saves a pass over all elements of the file
+        root = self.parse(filename, huge_tree)
+        if remove_namespaces:
+            self.remove_namespaces(root)
+        
+        return root
+
+    def parse(self, filename, huge_tree):
+        # filename can also be a member of a zip archive or a compressed file (see NeTEx_Source)
         parser = etree.XMLParser(huge_tree=huge_tree)
-        tree = etree.parse(filename, parser)
-        root = tree.getroot()
+        with NeTEx_Source().open(filename) as file:
+            tree = etree.parse(file, parser)
+        return tree.getroot()
 
+    def remove_namespaces(self, root):
         # remove namespaces from xml
         for elem in root.getiterator():
             if not hasattr(elem.tag, 'find'): continue  # guard for Comment tags
@@ -15,5 +29,16 @@ class XML_Handler:
                 elem.tag = elem.tag[i+1:]
 
         objectify.deannotate(root, cleanup_namespaces=True)
-        
-        return root
\ No newline at end of file
+
+    def iterparse(self, filename, huge_tree, remove_namespaces=True):
+        # yields the 'start' and 'end' event of every element while the file is parsed, so that the whole file doesn't need to be in memory
+        # the namespaces get removed in the 'start' event, so the elements look the same as the ones returned by the load function
+        with NeTEx_Source().open(filename) as file:
+            for event, elem in etree.iterparse(file, events=('start', 'end'), huge_tree=huge_tree):
+                if event == 'start' and remove_namespaces:
+                    i = elem.tag.find('}')
+
+                    if i >= 0:
+                        elem.tag = elem.tag[i+1:]
+
+                yield event, elem
\ No newline at end of file
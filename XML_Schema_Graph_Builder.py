@@ -1,28 +1,57 @@
 import networkx as nx
 from lxml import etree
-import uuid
+from concurrent.futures import ProcessPoolExecutor
+import time
 import os
 
 from XML_Handler import XML_Handler
 
 class XML_Schema_Graph_Builder:
-    def __init__(self):
+    def __init__(self, node_id_prefix=''):
         self.graph = nx.DiGraph()
+        # child nodes get the id '<node_id_prefix>:<counter>', the prefix is the path of the xsd file, so the ids are unique and the same in every run
+        self.node_id_prefix = node_id_prefix
+        self.node_count = 0
+        # duration of each phase in seconds
+        self.timings = {}
     
-    def create_graph(self, xsd_netex_path):
+    def create_graph(self, xsd_netex_path, workers=None):
+        start = time.perf_counter()
         folders = ['netex_framework', 'netex_part_1', 'netex_part_2', 'netex_part_3', 'netex_part_5']
 
         # add NeTEx XML schema files to schema graph
-        root = XML_Handler().load(f'{xsd_netex_path}/NeTEx_publication-NoConstraint.xsd', False)
-        self.process_file(root)
+        filenames = ['NeTEx_publication-NoConstraint.xsd']
 
         for folder in folders:
-            for route, _, files in os.walk(f'{xsd_netex_path}/{folder}'):
-                for file in files:
+            for route, subfolders, files in os.walk(f'{xsd_netex_path}/{folder}'):
+                # sorted, so that the graph is the same on every file system
+                subfolders.sort()
+                for file in sorted(files):
                     if file.endswith('.xsd'):
-                        filename = f'{route}/{file}'
-                        root = XML_Handler().load(filename, False)
-                        self.process_file(root)
+                        filenames.append(os.path.relpath(f'{route}/{file}', xsd_netex_path))
+
+        # every file is parsed and transformed to a graph on its own (in parallel if workers isn't 1)
+        # the graphs are merged afterwards in the same order as the files, so the result doesn't depend on the number of workers
+        if workers == 1:
+            file_graphs = [process_xsd_file(xsd_netex_path, filename) for filename in filenames]
+        else:
+            with ProcessPoolExecutor(workers) as executor:
+                file_graphs = list(executor.map(process_xsd_file, [xsd_netex_path] * len(filenames), filenames, chunksize=8))
+
+        merge_start = time.perf_counter()
+        for graph, _, _ in file_graphs:
+            self.graph.update(graph)
+
+        # the parse and process timings are the summed up durations of all files (cpu time across the workers)
+        self.timings['parse'] = sum(file_graph[1] for file_graph in file_graphs)
+        self.timings['process'] = sum(file_graph[2] for file_graph in file_graphs)
+        self.timings['merge'] = time.perf_counter() - merge_start
+        self.timings['total'] = time.perf_counter() - start
+
+
+    def create_node_id(self):
+        self.node_count += 1
+        return f'{self.node_id_prefix}:{self.node_count}'
 
 
     def process_file(self, node):
@@ -60,17 +89,23 @@ class XML_Schema_Graph_Builder:
 
     def process_node(self, node, graph_parent_node_id, is_list):
         for child in node:
-            # Assign each child nodes a random id, because they aren't unique
+            # Assign each child node its own id, because they aren't unique
             # Explanation: For example multiple nodes have the same child node 'placeEquipments'. If we assign 'placeEquipments' (tag of the child node) as
             # the node identifier in the graph, every 'placeEquipments' node would need to have the same attributes. But this isn't the case in NeTeX:
             # <xsd:element name="placeEquipments" type="placeEquipments_RelStructure" minOccurs="0"> in xsd/netex_part_1/part1_ifopt/netex_ifopt_equipmentAll.xsd
             # <xsd:element name="placeEquipments" type="equipments_RelStructure" minOccurs="0"> in xsd/netex_framework/netex_reusableComponents/netex_equipmentPlace_version.xsd
-            # For this reason every child node gets an random id assigned to be unique
-            random_id = str(uuid.uuid4())
-            
+            # For this reason every child node gets an unique id assigned (file path and counter)
             if child.tag in ['annotation', 'pattern', 'minLength', 'maxLength', 'unique', 'key'] or isinstance(child, etree._Comment):
                 continue
-            elif child.tag in ['complexType', 'choice', 'complexContent', 'simpleContent', 'restriction']:
+
+            child_node_id = self.create_node_id()
+
+            # the base type of a restriction or extension is stored at the type, so the xsd simple type of a element can be found
+            # example: <xsd:simpleType name="TimeType"><xsd:restriction base="xsd:time"/></xsd:simpleType>
+            if child.tag in ['restriction', 'extension'] and child.get('base') != None and graph_parent_node_id in self.graph.nodes:
+                self.graph.nodes[graph_parent_node_id]['base'] = child.get('base')
+
+            if child.tag in ['complexType', 'choice', 'complexContent', 'simpleContent', 'restriction']:
                 self.process_node(child, graph_parent_node_id, False)
             elif child.tag == 'sequence':
                 self.process_node(child, graph_parent_node_id, True)
@@ -80,7 +115,7 @@ class XML_Schema_Graph_Builder:
                 abstract = child.get('abstract')
                 
                 self.graph.add_node(
-                    random_id,
+                    child_node_id,
                     name = child.get('name'),
                     ref = ref,
                     node_type = child.tag,
@@ -88,46 +123,58 @@ class XML_Schema_Graph_Builder:
                     abstract = abstract
                 )
 
-                self.graph.add_edge(graph_parent_node_id, random_id, edge_type = None, is_list = is_list)
+                self.graph.add_edge(graph_parent_node_id, child_node_id, edge_type = None, is_list = is_list)
 
                 if abstract != 'true':
                     if type != None and not type.startswith('xsd'):
-                        self.graph.add_edge(random_id, type, edge_type = 'type', is_list = False)
+                        self.graph.add_edge(child_node_id, type, edge_type = 'type', is_list = False)
 
                     # TODO: Check if this if statement is needed
                     if ref != None:
-                        self.graph.add_edge(random_id, ref, edge_type = 'ref', is_list = False)
+                        self.graph.add_edge(child_node_id, ref, edge_type = 'ref', is_list = False)
 
-                    self.process_node(child, random_id, False)
+                    self.process_node(child, child_node_id, False)
             elif child.tag in ['extension']:
-                self.graph.add_node(random_id, node_type = child.tag)
-                self.graph.add_edge(graph_parent_node_id, random_id, edge_type = None, is_list = is_list)
+                self.graph.add_node(child_node_id, node_type = child.tag)
+                self.graph.add_edge(graph_parent_node_id, child_node_id, edge_type = None, is_list = is_list)
                 
                 base = child.get('base')
                 if not base.startswith('xsd'):
-                    self.graph.add_edge(random_id, base, edge_type = 'base', is_list = False)
+                    self.graph.add_edge(child_node_id, base, edge_type = 'base', is_list = False)
                 
-                self.process_node(child, random_id, False)
+                self.process_node(child, child_node_id, False)
             elif child.tag in ['enumeration', 'minInclusive', 'maxInclusive']:
-                self.graph.add_node(random_id, node_type = child.tag, value = child.get('value'))
-                self.graph.add_edge(graph_parent_node_id, random_id, edge_type = None, is_list = is_list)
+                self.graph.add_node(child_node_id, node_type = child.tag, value = child.get('value'))
+                self.graph.add_edge(graph_parent_node_id, child_node_id, edge_type = None, is_list = is_list)
             elif child.tag == 'attributeGroup':
-                self.graph.add_node(random_id, node_type = child.tag, ref = child.get('ref'))
-                self.graph.add_edge(graph_parent_node_id, random_id, edge_type = None, is_list = is_list)
-                self.graph.add_edge(random_id, child.get('ref'), edge_type = 'ref', is_list = False)
+                self.graph.add_node(child_node_id, node_type = child.tag, ref = child.get('ref'))
+                self.graph.add_edge(graph_parent_node_id, child_node_id, edge_type = None, is_list = is_list)
+                self.graph.add_edge(child_node_id, child.get('ref'), edge_type = 'ref', is_list = False)
             elif child.tag in ['simpleType', 'any']:
-                self.graph.add_node(random_id, node_type = child.tag)
-                self.graph.add_edge(graph_parent_node_id, random_id, edge_type = None, is_list = is_list)
+                self.graph.add_node(child_node_id, node_type = child.tag)
+                self.graph.add_edge(graph_parent_node_id, child_node_id, edge_type = None, is_list = is_list)
                 
-                self.process_node(child, random_id, False)
+                self.process_node(child, child_node_id, False)
             elif child.tag == 'list':
                 item_type = child.get('itemType')
                 
-                self.graph.add_node(random_id, node_type = child.tag, item_type = item_type)
-                self.graph.add_edge(graph_parent_node_id, random_id, edge_type = None, is_list = is_list)
+                self.graph.add_node(child_node_id, node_type = child.tag, item_type = item_type)
+                self.graph.add_edge(graph_parent_node_id, child_node_id, edge_type = None, is_list = is_list)
                 
                 if not item_type.startswith('xsd'):
-                    self.graph.add_edge(random_id, item_type, edge_type = None, is_list = is_list)
+                    self.graph.add_edge(child_node_id, item_type, edge_type = None, is_list = is_list)
             elif child.tag == 'unique':
-                self.graph.add_node(random_id, node_type = child.tag)
-                self.process_node(child, random_id, False)
\ No newline at end of file
+                self.graph.add_node(child_node_id, node_type = child.tag)
+                self.process_node(child, child_node_id, False)
+
+
+def process_xsd_file(xsd_netex_path, filename):
+    # returns the graph of a single xsd file and the durations for parsing and processing the file
+    start = time.perf_counter()
+    root = XML_Handler().load(f'{xsd_netex_path}/{filename}', False)
+    parse_end = time.perf_counter()
+
+    xml_schema_graph_builder = XML_Schema_Graph_Builder(filename)
+    xml_schema_graph_builder.process_file(root)
+
+    return xml_schema_graph_builder.graph, parse_end - start, time.perf_counter() - parse_end
\ No newline at end of file
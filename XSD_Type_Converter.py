@@ -0,0 +1,102 @@
+from sqlalchemy import String, Integer, BigInteger, Numeric, Float, Boolean, Date, Time, DateTime
+from sqlalchemy.dialects.postgresql import INTERVAL
+from decimal import Decimal, InvalidOperation
+import datetime
+
+
+class XSD_Type_Converter:
+    # xsd simple type -> (column type, name of the method that converts the text of a xml element)
+    # xsd types that aren't listed here are stored as text
+    types = {
+        'xsd:integer': (BigInteger, 'to_integer'),
+        'xsd:long': (BigInteger, 'to_integer'),
+        'xsd:nonNegativeInteger': (BigInteger, 'to_integer'),
+        'xsd:positiveInteger': (BigInteger, 'to_integer'),
+        'xsd:negativeInteger': (BigInteger, 'to_integer'),
+        'xsd:nonPositiveInteger': (BigInteger, 'to_integer'),
+        'xsd:unsignedInt': (BigInteger, 'to_integer'),
+        'xsd:int': (Integer, 'to_integer'),
+        'xsd:short': (Integer, 'to_integer'),
+        'xsd:unsignedShort': (Integer, 'to_integer'),
+        'xsd:byte': (Integer, 'to_integer'),
+        'xsd:unsignedByte': (Integer, 'to_integer'),
+        'xsd:decimal': (Numeric, 'to_decimal'),
+        'xsd:double': (Float, 'to_float'),
+        'xsd:float': (Float, 'to_float'),
+        'xsd:boolean': (Boolean, 'to_boolean'),
+        'xsd:date': (Date, 'to_date'),
+        'xsd:time': (Time, 'to_time'),
+        'xsd:dateTime': (DateTime, 'to_datetime'),
+        # postgresql reads the iso 8601 format of durations (example: 'PT10M') directly, for this reason the text is kept
+        'xsd:duration': (INTERVAL, 'to_text')
+    }
+
+    def get_column_type(self, xsd_type):
+        if xsd_type in self.types:
+            return self.types[xsd_type][0]
+        return String
+
+
+    def get_converter(self, xsd_type):
+        # returns None if the text doesn't need to be converted
+        if xsd_type in self.types:
+            return getattr(self, self.types[xsd_type][1])
+        return None
+
+
+    # every converter returns None if the text isn't a valid value of the type, so a single invalid value doesn't prevent the insertion of a file
+    # the readers count these values per column (see Ingestion_Metrics.add_rejected_value)
+    def to_integer(self, text):
+        try:
+            return int(text)
+        except ValueError:
+            return None
+
+
+    def to_decimal(self, text):
+        try:
+            return Decimal(text.strip())
+        except InvalidOperation:
+            return None
+
+
+    def to_float(self, text):
+        try:
+            return float(text)
+        except ValueError:
+            return None
+
+
+    def to_boolean(self, text):
+        text = text.strip()
+        if text in ['true', '1']:
+            return True
+        elif text in ['false', '0']:
+            return False
+        return None
+
+
+    def to_date(self, text):
+        # the time zone of a date (example: '2023-01-01Z') is ignored
+        try:
+            return datetime.date.fromisoformat(text.strip()[:10])
+        except ValueError:
+            return None
+
+
+    def to_time(self, text):
+        try:
+            return datetime.time.fromisoformat(text.strip())
+        except ValueError:
+            return None
+
+
+    def to_datetime(self, text):
+        try:
+            return datetime.datetime.fromisoformat(text.strip())
+        except ValueError:
+            return None
+
+
+    def to_text(self, text):
+        return text.strip()
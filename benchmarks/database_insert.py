@@ -0,0 +1,117 @@
+# compares the COPY based Database_Handler.insert with the previous INSERT statement based implementation
+# the previous implementation is kept here, so that pandas and geopandas are only needed for this benchmark
+# usage (from the repository root): python -m benchmarks.database_insert --rows 100000
+from shapely.geometry import Point
+from shapely import wkt
+import pandas as pd
+import geopandas as gpd
+import shapely
+import argparse
+import math
+import time
+
+from Database_Handler import Database_Handler
+from JSON_Encoder import JSON_Encoder
+import config
+
+table_name = 'benchmark_database_insert'
+json_encoder = JSON_Encoder()
+
+
+def insert_with_values(database_handler, table_name, table_rows):
+    # previous implementation with INSERT statements
+    if len(table_rows) > 0:
+        table = normalize_rows(table_rows)
+
+        column_names = table[0].keys()
+        query = f'INSERT INTO {table_name} ({{}}) VALUES '.format(','.join(column_names))
+
+        # split table in chunks
+        table_chunks = [table[i:i + 1000] for i in range(0, len(table), 1000)]
+        for table_chunk in table_chunks:
+            table_values = []
+
+            for row in table_chunk:
+                row_values = []
+                for value in row.values():
+                    row_values.append(value_to_string(value))
+
+                table_values.append('(' + ','.join(row_values) + ')')
+
+            table_values = ','.join(table_values)
+
+            database_handler.postgresql_db.engine.execute(query + table_values)
+
+
+def normalize_rows(table_rows):
+    if 'geom' in table_rows[0].keys():
+        table = gpd.GeoDataFrame(table_rows, geometry='geom')
+    else:
+        table = pd.DataFrame(table_rows)
+
+    # ensures that each row has the same column count
+    # if a row don't has a specific column value, it automatically sets the value to null
+    return list(table.T.to_dict().values())
+
+
+def value_to_string(value):
+    # the texts are sql string literals, apostrophes are escaped by doubling them
+    if isinstance(value, dict):
+        return "'" + json_encoder.encode(value).replace("'", "''") + "'::jsonb"
+    elif isinstance(value, list):
+        value_list = []
+        for item in value:
+            value_list.append(value_to_string(item))
+        list_string = ','.join(value_list)
+        return 'ARRAY[' + list_string + ']'
+    elif value == None or (isinstance(value, float) and math.isnan(value)):
+        return 'NULL'
+    elif isinstance(value, shapely.geometry.base.BaseGeometry):
+        return "ST_SetSRID(ST_GeomFromText('" + wkt.dumps(value) + "'), 4326)"
+    else:
+        return "'" + str(value).replace("'", "''") + "'"
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark Database_Handler.insert against the previous implementation with INSERT statements')
+    parser.add_argument('--rows', type=int, default=100000, help='number of synthetic rows')
+    args = parser.parse_args()
+
+    # rows that look like the rows of the table 'timetabled_passing_time', with an additional geometry
+    table_rows = [
+        {
+            'id': f'RUT:TimetabledPassingTime:{i}',
+            'attributes': {'version': '1'},
+            'stop_point_in_journey_pattern_ref': f'RUT:StopPointInJourneyPattern:{i % 50}',
+            'departure_time': '08:15:00',
+            'notice_assignments': [{'notice_assignment': {'notice_ref': 'RUT:Notice:1'}}],
+            'geom': Point(10.0 + i / 1000000, 59.0),
+            'parent_id': f'RUT:ServiceJourney:{i // 20}'
+        }
+        for i in range(args.rows)
+    ]
+
+    database_handler = Database_Handler(config.db_connection_url)
+    database_handler.postgresql_db.engine.execute(f'''
+        DROP TABLE IF EXISTS {table_name};
+        CREATE TABLE {table_name} (
+            id varchar, attributes jsonb, stop_point_in_journey_pattern_ref varchar, departure_time varchar,
+            notice_assignments jsonb[], geom geometry, parent_id varchar
+        )
+    ''')
+
+    try:
+        for name, insert_function in [
+            ('insert_with_values', lambda: insert_with_values(database_handler, table_name, table_rows)),
+            ('insert', lambda: database_handler.insert(table_name, table_rows))
+        ]:
+            database_handler.postgresql_db.engine.execute(f'TRUNCATE {table_name}')
+
+            start = time.perf_counter()
+            insert_function()
+            duration = time.perf_counter() - start
+
+            print(f'{name}: {duration:.2f} s ({args.rows / duration:.0f} rows/s)')
+    finally:
+        database_handler.close()
+        database_handler.postgresql_db.engine.execute(f'DROP TABLE IF EXISTS {table_name}')
@@ -0,0 +1,70 @@
+# measures the throughput of the gml reader on large 'TariffZone' polygons and compares it with the previous string round trip through pygml
+# both implementations are measured with the same work: reading only and reading plus the reprojection to EPSG:4326
+# usage (from the repository root): python -m benchmarks.gml_geometry --vertices 1000000
+from shapely.geometry import shape
+from shapely.ops import transform
+from lxml import etree
+import argparse
+import pyproj
+import math
+import time
+import pygml
+
+from Geometry_Handler import Geometry_Handler
+
+
+def read_with_geometry_handler(polygon, reproject):
+    geometry_handler = Geometry_Handler()
+    geom = geometry_handler.gml_to_shapely(polygon)
+    if reproject:
+        geom = geometry_handler.reproject([geom], 25833)[0]
+    return geom
+
+
+def read_with_pygml(polygon, reproject):
+    # previous implementation: serialize the element, rewrite the namespace prefixes, parse the string with pygml and transform every coordinate
+    string = etree.tostring(polygon, encoding=str)
+    string = string.replace('<', '<gml:').replace('<gml:/', '</gml:')
+    geom = shape(pygml.parse(string))
+    if reproject:
+        project = pyproj.Transformer.from_crs(pyproj.CRS('EPSG:25833'), pyproj.CRS('EPSG:4326'), always_xy=True).transform
+        geom = transform(project, geom)
+    return geom
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark the gml reader on a large polygon')
+    parser.add_argument('--vertices', type=int, default=1000000, help='number of vertices of the polygon')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    # circle around Oslo in EPSG:25833 (UTM zone 33N), like the polygons of 'TariffZone' in the norwegian NeTEx files
+    coordinates = []
+    for i in range(args.vertices):
+        angle = 2 * math.pi * i / args.vertices
+        coordinates.append(f'{262000 + 20000 * math.cos(angle):.3f} {6650000 + 20000 * math.sin(angle):.3f}')
+    coordinates.append(coordinates[0])
+
+    gml_string = f'''<TariffZone xmlns="http://www.netex.org.uk/netex" xmlns:gml="http://www.opengis.net/gml/3.2" id="BEN:TariffZone:1" version="1">
+        <gml:Polygon gml:id="BEN-Polygon-1" srsName="EPSG:25833">
+            <gml:exterior><gml:LinearRing><gml:posList>{' '.join(coordinates)}</gml:posList></gml:LinearRing></gml:exterior>
+        </gml:Polygon>
+    </TariffZone>'''
+    size = len(gml_string.encode()) / 1000000
+
+    root = etree.fromstring(gml_string, etree.XMLParser(huge_tree=True))
+    for elem in root.iter():
+        elem.tag = elem.tag[elem.tag.find('}') + 1:]
+    polygon = root[0]
+
+    for reproject in [False, True]:
+        for read_function in [read_with_geometry_handler, read_with_pygml]:
+            durations = []
+            for _ in range(args.repeat):
+                start = time.perf_counter()
+                read_function(polygon, reproject)
+                durations.append(time.perf_counter() - start)
+
+            duration = min(durations)
+            name = f'{read_function.__name__} ({"read and reproject" if reproject else "read"})'
+            print(f'{name}: {duration:.3f} s ({args.vertices / duration:.0f} vertices/s, {size / duration:.1f} MB/s)')
@@ -0,0 +1,142 @@
+# measures every stage of the ingestion on a synthetic NeTEx file (see benchmarks/netex_generator.py)
+# the results are appended to a history file and compared with the last run with the same parameters, so that performance regressions get visible
+# the database insert is optional, it uses the database of config.py, but creates the tables in its own postgresql schema 'netex_benchmark'
+# usage (from the repository root): python -m benchmarks.ingestion --service-journeys 10000 --database
+import subprocess
+import argparse
+import datetime
+import tempfile
+import json
+import time
+import os
+
+from benchmarks.netex_generator import generate_netex_file, add_arguments, get_generator_arguments
+from XML_Handler import XML_Handler
+from Schema_Plan import Schema_Plan
+from NeTEx_File_Reader import NeTEx_File_Reader
+from Ingestion_Metrics import Ingestion_Metrics
+
+stages = {}
+
+
+def add_stage(stage_name, seconds, rows=None, size=None):
+    stages[stage_name] = {'seconds': seconds}
+    if rows != None:
+        stages[stage_name]['rows_per_second'] = rows / seconds
+    if size != None:
+        stages[stage_name]['mb_per_second'] = size / 1000000 / seconds
+
+
+if __name__ == '__main__':
+    # the guard is needed, because Schema_Plan.load builds the schema graph in worker processes, which import this module with the spawn and forkserver start methods
+    parser = argparse.ArgumentParser(description='Benchmark the stages of the ingestion on a synthetic NeTEx file')
+    parser.add_argument('--xsd-netex-path', default='xsd_netex')
+    parser.add_argument('--rebuild-schema', action='store_true', help='measure the schema build instead of using the cached schema plan')
+    parser.add_argument('--database', action='store_true', help='also measure the insert into the database')
+    parser.add_argument('--history', default='benchmarks/ingestion_history.jsonl', help='file with the results of all runs (ignored by git)')
+    parser.add_argument('--label', default='', help='label of the run in the history, example: the name of the change')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = f'{directory}/synthetic_netex.xml'
+        counts = generate_netex_file(filename, **get_generator_arguments(args))
+        size = os.path.getsize(filename)
+        print(f'synthetic file: {size / 1000000:.1f} MB, {sum(counts.values())} table elements')
+
+        start = time.perf_counter()
+        if args.rebuild_schema:
+            schema_plan = Schema_Plan(args.xsd_netex_path, cache_path=f'{directory}/schema_plan.pickle').load()
+        else:
+            schema_plan = Schema_Plan(args.xsd_netex_path).load()
+        add_stage('schema', time.perf_counter() - start)
+
+        xml_handler = XML_Handler()
+        start = time.perf_counter()
+        root = xml_handler.parse(filename, True)
+        xml_handler.remove_namespaces(root)
+        add_stage('xml_load', time.perf_counter() - start, size=size)
+
+        metrics = Ingestion_Metrics()
+        netex_file_reader = NeTEx_File_Reader(schema_plan.schema, schema_plan.simplified_schema_graph, schema_plan.dispatch_tables, metrics)
+        start = time.perf_counter()
+        netex_file_reader.query_node(root, 'PublicationDelivery', None, None)
+        query_node_seconds = time.perf_counter() - start
+        row_count = sum(len(table_rows) for table_rows in netex_file_reader.results.values())
+
+        start = time.perf_counter()
+        netex_file_reader.reproject_geometries()
+        reproject_seconds = time.perf_counter() - start
+
+        # the geometries are read during query_node, for this reason their time is measured separately and subtracted
+        geometry_seconds = metrics.current_file['stages'].get('geometry', {}).get('wall_seconds', 0.0)
+        add_stage('query_node', query_node_seconds - geometry_seconds, rows=row_count)
+        add_stage('geometry', geometry_seconds + reproject_seconds, rows=counts['tariff_zone'])
+
+        if args.database:
+            # imported here, so that the benchmark also works without a database
+            from sqlalchemy import create_engine
+            from Final_Schema_Builder import Final_Schema_Builder
+            from Database_Handler import Database_Handler
+            import config
+
+            # the tables are created in a separate postgresql schema, so that existing tables aren't touched
+            separator = '&' if '?' in config.db_connection_url else '?'
+            db_connection_url = f'{config.db_connection_url}{separator}options=-csearch_path%3Dnetex_benchmark%2Cpublic'
+            engine = create_engine(config.db_connection_url)
+            engine.execute('DROP SCHEMA IF EXISTS netex_benchmark CASCADE; CREATE SCHEMA netex_benchmark')
+
+            try:
+                final_schema_builder = Final_Schema_Builder(schema_plan.simplified_schema_graph)
+                final_schema_builder.schema = schema_plan.schema
+                final_schema_builder.create_tables_in_database(db_connection_url)
+
+                database_handler = Database_Handler(db_connection_url, metrics=metrics, schema=schema_plan.schema)
+                start = time.perf_counter()
+                with database_handler.file_transaction():
+                    for table_name, table_rows in netex_file_reader.results.items():
+                        database_handler.insert(table_name, table_rows, os.path.basename(filename))
+                database_handler.close()
+
+                copy_size = sum(table['bytes'] for table in metrics.current_file['tables'].values())
+                add_stage('database_insert', time.perf_counter() - start, rows=row_count, size=copy_size)
+            finally:
+                engine.execute('DROP SCHEMA IF EXISTS netex_benchmark CASCADE')
+
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True, text=True).stdout.strip()
+    except OSError:
+        commit = None
+
+    result = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'commit': commit,
+        'label': args.label,
+        'parameters': get_generator_arguments(args),
+        'file_mb': size / 1000000,
+        'rows': row_count,
+        'stages': stages
+    }
+
+    # the last run with the same parameters is used as reference
+    previous_result = None
+    if os.path.exists(args.history):
+        with open(args.history) as file:
+            for line in file:
+                history_result = json.loads(line)
+                if history_result['parameters'] == result['parameters']:
+                    previous_result = history_result
+
+    for stage_name, stage in stages.items():
+        line = f'{stage_name}: {stage["seconds"]:.3f} s'
+        if 'rows_per_second' in stage:
+            line += f', {stage["rows_per_second"]:.0f} rows/s'
+        if 'mb_per_second' in stage:
+            line += f', {stage["mb_per_second"]:.1f} MB/s'
+        if previous_result != None and stage_name in previous_result['stages']:
+            change = stage['seconds'] / previous_result['stages'][stage_name]['seconds'] - 1
+            line += f' ({change:+.1%} compared to {previous_result["commit"]} {previous_result["label"]})'
+        print(line)
+
+    with open(args.history, 'a') as file:
+        file.write(json.dumps(result) + '\n')
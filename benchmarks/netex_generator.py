@@ -0,0 +1,161 @@
+# generates synthetic NeTEx files with the structure of the norwegian NeTEx files (stops, tariff zones, journey patterns, service journeys and passing times)
+# the size of the files can be configured, so that performance regressions can be reproduced without the real data
+# usage (from the repository root): python -m benchmarks.netex_generator benchmark_netex/synthetic.xml --service-journeys 10000 --validate xsd_netex
+from lxml import etree
+import argparse
+import random
+import math
+import os
+
+namespaces = 'xmlns="http://www.netex.org.uk/netex" xmlns:gml="http://www.opengis.net/gml/3.2"'
+
+
+def generate_netex_file(
+    filename, stop_places=1000, quays_per_stop_place=2, journey_patterns=100, stops_per_journey_pattern=20, service_journeys=1000,
+    tariff_zones=10, zone_vertices=1000, codespace='BEN', seed=0
+):
+    # returns the number of elements of every table
+    # the file is written element by element, so that also files which don't fit into memory can be generated
+    generator = random.Random(seed)
+    os.makedirs(os.path.dirname(os.path.abspath(filename)), exist_ok=True)
+
+    with open(filename, 'w', encoding='utf-8') as file:
+        file.write(f'<?xml version="1.0" encoding="UTF-8"?>\n<PublicationDelivery {namespaces} version="1.13:NO-NeTEx-networktimetable:1.3">\n')
+        file.write('<PublicationTimestamp>2023-01-01T00:00:00</PublicationTimestamp>\n')
+        file.write(f'<ParticipantRef>{codespace}</ParticipantRef>\n')
+        file.write('<dataObjects>\n')
+        file.write(f'<CompositeFrame id="{codespace}:CompositeFrame:1" version="1">\n<frames>\n')
+
+        # stop places with quays around Oslo and tariff zones in EPSG:25833, like in the norwegian files
+        file.write(f'<SiteFrame id="{codespace}:SiteFrame:1" version="1">\n<stopPlaces>\n')
+        for i in range(stop_places):
+            longitude = 10.5 + generator.uniform(-0.5, 0.5)
+            latitude = 59.9 + generator.uniform(-0.3, 0.3)
+
+            file.write(f'<StopPlace id="{codespace}:StopPlace:{i}" version="1">')
+            file.write(f'<Name>Stop place {i}</Name>')
+            file.write(f'<Centroid><Location><Longitude>{longitude:.6f}</Longitude><Latitude>{latitude:.6f}</Latitude></Location></Centroid>')
+            file.write('<TransportMode>bus</TransportMode><StopPlaceType>onstreetBus</StopPlaceType>')
+            file.write('<quays>')
+            for j in range(quays_per_stop_place):
+                file.write(f'<Quay id="{codespace}:Quay:{i * quays_per_stop_place + j}" version="1">')
+                file.write(f'<Centroid><Location><Longitude>{longitude + j * 0.0001:.6f}</Longitude><Latitude>{latitude:.6f}</Latitude></Location></Centroid>')
+                file.write(f'<PublicCode>{j + 1}</PublicCode>')
+                file.write('</Quay>')
+            file.write('</quays></StopPlace>\n')
+        file.write('</stopPlaces>\n<tariffZones>\n')
+
+        for i in range(tariff_zones):
+            x = 262000 + generator.uniform(-50000, 50000)
+            y = 6650000 + generator.uniform(-50000, 50000)
+            coordinates = []
+            for k in range(zone_vertices):
+                angle = 2 * math.pi * k / zone_vertices
+                coordinates.append(f'{x + 5000 * math.cos(angle):.3f} {y + 5000 * math.sin(angle):.3f}')
+            coordinates.append(coordinates[0])
+
+            file.write(f'<TariffZone id="{codespace}:TariffZone:{i}" version="1"><Name>Zone {i}</Name>')
+            file.write(f'<gml:Polygon gml:id="{codespace}-TariffZone-{i}" srsName="EPSG:25833"><gml:exterior><gml:LinearRing>')
+            file.write(f'<gml:posList>{" ".join(coordinates)}</gml:posList>')
+            file.write('</gml:LinearRing></gml:exterior></gml:Polygon></TariffZone>\n')
+        file.write('</tariffZones>\n</SiteFrame>\n')
+
+        # every quay has a scheduled stop point and a passenger stop assignment
+        quay_count = stop_places * quays_per_stop_place
+        file.write(f'<ServiceFrame id="{codespace}:ServiceFrame:1" version="1">\n<scheduledStopPoints>\n')
+        for i in range(quay_count):
+            file.write(f'<ScheduledStopPoint id="{codespace}:ScheduledStopPoint:{i}" version="1"><Name>Stop point {i}</Name></ScheduledStopPoint>\n')
+        file.write('</scheduledStopPoints>\n<stopAssignments>\n')
+        for i in range(quay_count):
+            file.write(f'<PassengerStopAssignment id="{codespace}:PassengerStopAssignment:{i}" version="1" order="{i + 1}">')
+            file.write(f'<ScheduledStopPointRef ref="{codespace}:ScheduledStopPoint:{i}" version="1"/><QuayRef ref="{codespace}:Quay:{i}"/>')
+            file.write('</PassengerStopAssignment>\n')
+        file.write('</stopAssignments>\n<journeyPatterns>\n')
+
+        stops_per_journey_pattern = min(stops_per_journey_pattern, quay_count)
+        journey_pattern_stops = []
+        for i in range(journey_patterns):
+            stop_point_ids = generator.sample(range(quay_count), stops_per_journey_pattern)
+            journey_pattern_stops.append(stop_point_ids)
+
+            file.write(f'<JourneyPattern id="{codespace}:JourneyPattern:{i}" version="1"><Name>Journey pattern {i}</Name><pointsInSequence>')
+            for order, stop_point_id in enumerate(stop_point_ids):
+                file.write(f'<StopPointInJourneyPattern id="{codespace}:StopPointInJourneyPattern:{i}_{order}" version="1" order="{order + 1}">')
+                file.write(f'<ScheduledStopPointRef ref="{codespace}:ScheduledStopPoint:{stop_point_id}" version="1"/>')
+                file.write('</StopPointInJourneyPattern>')
+            file.write('</pointsInSequence></JourneyPattern>\n')
+        file.write('</journeyPatterns>\n</ServiceFrame>\n')
+
+        # service journeys with one passing time per stop of the journey pattern
+        file.write(f'<TimetableFrame id="{codespace}:TimetableFrame:1" version="1">\n<vehicleJourneys>\n')
+        passing_time_count = 0
+        for i in range(service_journeys):
+            journey_pattern_id = i % journey_patterns
+            minutes = generator.randrange(5 * 60, 23 * 60)
+
+            file.write(f'<ServiceJourney id="{codespace}:ServiceJourney:{i}" version="1">')
+            file.write(f'<JourneyPatternRef ref="{codespace}:JourneyPattern:{journey_pattern_id}" version="1"/><passingTimes>')
+            for order in range(len(journey_pattern_stops[journey_pattern_id])):
+                departure_time = f'{(minutes // 60) % 24:02d}:{minutes % 60:02d}:00'
+                file.write(f'<TimetabledPassingTime id="{codespace}:TimetabledPassingTime:{i}_{order}" version="1">')
+                file.write(f'<StopPointInJourneyPatternRef ref="{codespace}:StopPointInJourneyPattern:{journey_pattern_id}_{order}" version="1"/>')
+                file.write(f'<DepartureTime>{departure_time}</DepartureTime>')
+                file.write('</TimetabledPassingTime>')
+                minutes += generator.randrange(1, 4)
+                passing_time_count += 1
+            file.write('</passingTimes></ServiceJourney>\n')
+        file.write('</vehicleJourneys>\n</TimetableFrame>\n')
+
+        file.write('</frames>\n</CompositeFrame>\n</dataObjects>\n</PublicationDelivery>\n')
+
+    return {
+        'stop_place': stop_places,
+        'quay': quay_count,
+        'tariff_zone': tariff_zones,
+        'scheduled_stop_point': quay_count,
+        'passenger_stop_assignment': quay_count,
+        'journey_pattern': journey_patterns,
+        'stop_point_in_journey_pattern': journey_patterns * stops_per_journey_pattern,
+        'service_journey': service_journeys,
+        'timetabled_passing_time': passing_time_count
+    }
+
+
+def validate_netex_file(filename, xsd_netex_path):
+    # raises an exception if the file isn't valid against the NeTEx xml schema
+    xml_schema = etree.XMLSchema(etree.parse(f'{xsd_netex_path}/NeTEx_publication.xsd'))
+    xml_schema.assertValid(etree.parse(filename, etree.XMLParser(huge_tree=True)))
+
+
+def add_arguments(parser):
+    parser.add_argument('--stop-places', type=int, default=1000)
+    parser.add_argument('--quays-per-stop-place', type=int, default=2)
+    parser.add_argument('--journey-patterns', type=int, default=100)
+    parser.add_argument('--stops-per-journey-pattern', type=int, default=20)
+    parser.add_argument('--service-journeys', type=int, default=1000)
+    parser.add_argument('--tariff-zones', type=int, default=10)
+    parser.add_argument('--zone-vertices', type=int, default=1000)
+    parser.add_argument('--seed', type=int, default=0)
+
+
+def get_generator_arguments(args):
+    return {
+        'stop_places': args.stop_places, 'quays_per_stop_place': args.quays_per_stop_place, 'journey_patterns': args.journey_patterns,
+        'stops_per_journey_pattern': args.stops_per_journey_pattern, 'service_journeys': args.service_journeys, 'tariff_zones': args.tariff_zones,
+        'zone_vertices': args.zone_vertices, 'seed': args.seed
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Generate a synthetic NeTEx file')
+    parser.add_argument('filename')
+    parser.add_argument('--validate', metavar='XSD_NETEX_PATH', help='validate the generated file against the xml schema in this directory')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    counts = generate_netex_file(args.filename, **get_generator_arguments(args))
+    print(f'{args.filename}: {os.path.getsize(args.filename) / 1000000:.1f} MB, ' + ', '.join(f'{count} {table_name}' for table_name, count in counts.items()))
+
+    if args.validate != None:
+        validate_netex_file(args.filename, args.validate)
+        print('valid')
@@ -0,0 +1,78 @@
+# measures the traversals of the schema builders on the full xsd_netex set and of the file reader on deeply nested xml elements
+# before the traversals were iterative, the reader failed with a RecursionError on elements nested deeper than the recursion limit (1000)
+# usage (from the repository root): python -m benchmarks.schema_traversal --xsd-netex-path xsd_netex --depth 100000
+from lxml import etree
+import argparse
+import time
+
+from XML_Schema_Graph_Builder import XML_Schema_Graph_Builder
+from Simplified_Schema_Graph_Builder import Simplified_Schema_Graph_Builder
+from Final_Schema_Builder import Final_Schema_Builder
+from NeTEx_File_Reader import NeTEx_File_Reader
+
+# element 'Nested' inside of itself, the dispatch table of the node points to itself
+schema = {'PublicationDelivery': {'id': {}, 'nested': {}}}
+dispatch_tables = {
+    'PublicationDelivery': {'Nested': ('nested', False, 'Nested', False)},
+    'Nested': {'Nested': ('nested', False, 'Nested', False), 'Value': ('value', False, 'Value', False)},
+    'Value': {}
+}
+
+
+def measure(name, function, size, repeat):
+    durations = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        durations.append(time.perf_counter() - start)
+
+    duration = min(durations)
+    print(f'{name}: {duration:.3f} s ({size / duration:.0f} nodes/s)')
+    return result
+
+
+def create_simplified_schema_graph(schema_graph):
+    simplified_schema_graph_builder = Simplified_Schema_Graph_Builder(schema_graph)
+    simplified_schema_graph_builder.create_graph('PublicationDelivery', 'PublicationDelivery')
+    return simplified_schema_graph_builder.graph
+
+
+def create_final_schema(simplified_schema_graph):
+    final_schema_builder = Final_Schema_Builder(simplified_schema_graph)
+    final_schema_builder.create_schema('PublicationDelivery', None, set())
+    return final_schema_builder.schema
+
+
+def create_nested_element(depth):
+    root = etree.Element('PublicationDelivery')
+    element = etree.SubElement(root, 'Nested')
+    for _ in range(depth):
+        element = etree.SubElement(element, 'Nested')
+    etree.SubElement(element, 'Value').text = 'value'
+    return root
+
+
+def read_nested_element(root):
+    netex_file_reader = NeTEx_File_Reader(schema, None, dispatch_tables)
+    netex_file_reader.query_node(root, 'PublicationDelivery', None, None)
+    return netex_file_reader.results
+
+
+if __name__ == '__main__':
+    # the guard is needed, because create_graph parses the xsd files in worker processes, which import this module with the spawn and forkserver start methods
+    parser = argparse.ArgumentParser(description='Benchmark the traversals of the schema builders and of the file reader')
+    parser.add_argument('--xsd-netex-path', default='xsd_netex')
+    parser.add_argument('--depth', type=int, default=100000, help='depth of the nested xml element for the file reader')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+
+    xml_schema_graph_builder = XML_Schema_Graph_Builder()
+    xml_schema_graph_builder.create_graph(args.xsd_netex_path)
+    schema_graph = xml_schema_graph_builder.graph
+    print(f'xml schema graph: {schema_graph.number_of_nodes()} nodes, {schema_graph.number_of_edges()} edges')
+
+    simplified_schema_graph = measure('simplified schema graph', lambda: create_simplified_schema_graph(schema_graph), schema_graph.number_of_nodes(), args.repeat)
+    measure('final schema', lambda: create_final_schema(simplified_schema_graph), simplified_schema_graph.number_of_nodes(), args.repeat)
+
+    root = create_nested_element(args.depth)
+    measure(f'file reader (depth {args.depth})', lambda: read_nested_element(root), args.depth, args.repeat)
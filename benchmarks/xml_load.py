@@ -0,0 +1,82 @@
+# compares loading a NeTEx file with removing the namespaces after parsing (the previous approach) and without (--keep-namespaces)
+# every mode runs in its own process, so that the peak memory of one mode doesn't hide the peak memory of the other one
+# the rows of both modes are compared, because the readers have to create the same rows with and without namespaces
+# usage (from the repository root): python -m benchmarks.xml_load --service-journeys 20000
+import multiprocessing
+import argparse
+import tempfile
+import time
+import os
+
+from benchmarks.netex_generator import generate_netex_file, add_arguments, get_generator_arguments
+
+modes = ['remove_namespaces', 'keep_namespaces']
+
+
+def measure_mode(filename, xsd_netex_path, mode, repeat):
+    # imported in the process of the mode, so that the memory of the imports is the same in every mode
+    from XML_Handler import XML_Handler
+    from Schema_Plan import Schema_Plan
+    from NeTEx_File_Reader import NeTEx_File_Reader
+    from Ingestion_Metrics import Ingestion_Metrics
+
+    metrics = Ingestion_Metrics()
+    xml_handler = XML_Handler()
+
+    load_durations = []
+    for _ in range(repeat):
+        # the tree of the previous load is freed first, otherwise the peak memory would contain two trees
+        root = None
+        start = time.perf_counter()
+        root = xml_handler.load(filename, True, remove_namespaces=mode == 'remove_namespaces')
+        load_durations.append(time.perf_counter() - start)
+    # the schema plan is loaded after the file, so that the peak memory of the load isn't hidden by it
+    load_peak_rss = metrics.get_peak_rss()
+
+    schema_plan = Schema_Plan(xsd_netex_path).load()
+    netex_file_reader = NeTEx_File_Reader(schema_plan.schema, schema_plan.simplified_schema_graph, schema_plan.dispatch_tables, metrics)
+    start = time.perf_counter()
+    netex_file_reader.query_node(root, 'PublicationDelivery', None, None)
+    netex_file_reader.reproject_geometries()
+    read_duration = time.perf_counter() - start
+
+    return {
+        'load_seconds': min(load_durations),
+        'read_seconds': read_duration,
+        'load_peak_rss_bytes': load_peak_rss,
+        'rows': {table_name: len(table_rows) for table_name, table_rows in netex_file_reader.results.items() if len(table_rows) > 0}
+    }
+
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Benchmark loading NeTEx files with and without removing the namespaces')
+    parser.add_argument('--xsd-netex-path', default='xsd_netex')
+    parser.add_argument('--repeat', type=int, default=3, help='number of loads per mode, the fastest one is reported')
+    add_arguments(parser)
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory() as directory:
+        filename = f'{directory}/synthetic_netex.xml'
+        generate_netex_file(filename, **get_generator_arguments(args))
+        size = os.path.getsize(filename)
+        print(f'synthetic file: {size / 1000000:.1f} MB')
+
+        # spawn instead of fork, so that every mode starts with a fresh process
+        context = multiprocessing.get_context('spawn')
+        results = {}
+        for mode in modes:
+            with context.Pool(1) as pool:
+                results[mode] = pool.apply(measure_mode, (filename, args.xsd_netex_path, mode, args.repeat))
+
+    reference = results[modes[0]]
+    for mode, result in results.items():
+        line = (
+            f'{mode}: load {result["load_seconds"]:.3f} s ({size / 1000000 / result["load_seconds"]:.1f} MB/s), '
+            f'peak memory {result["load_peak_rss_bytes"] / 1000000:.0f} MB, read {result["read_seconds"]:.3f} s'
+        )
+        if mode != modes[0]:
+            line += f' (load {result["load_seconds"] / reference["load_seconds"] - 1:+.1%}, read {result["read_seconds"] / reference["read_seconds"] - 1:+.1%})'
+        print(line)
+
+        if result['rows'] != reference['rows']:
+            print(f'{mode}: different rows than {modes[0]}: {result["rows"]} != {reference["rows"]}')
@@ -1,14 +1,17 @@
-from XML_Schema_Graph_Builder import XML_Schema_Graph_Builder
-from Simplified_Schema_Graph_Builder import Simplified_Schema_Graph_Builder
+from Schema_Plan import Schema_Plan
 from Final_Schema_Builder import Final_Schema_Builder 
 import config
+import argparse
 
-xml_schema_graph_builder = XML_Schema_Graph_Builder()
-xml_schema_graph_builder.create_graph('xsd_netex')
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Create the tables in the database')
+    parser.add_argument('--partitioned', action='store_true', help='partition the largest tables by source file, so that a file can be replaced without a DELETE')
+    parser.add_argument('--ancestor-ids', action='store_true', help='create the gin indexes on the column ancestor_ids (see insert_netex_files_into_db.py --ancestor-ids)')
+    parser.add_argument('--tables', nargs='+', help='only use these tables and the tables that contain them, example: --tables StopPlace Quay')
+    args = parser.parse_args()
 
-simplified_schema_graph_builder = Simplified_Schema_Graph_Builder(xml_schema_graph_builder.graph)
-simplified_schema_graph_builder.create_graph('PublicationDelivery', 'PublicationDelivery')
+    schema_plan = Schema_Plan('xsd_netex', selected_table_names=args.tables).load()
 
-final_schema_builder = Final_Schema_Builder(simplified_schema_graph_builder.graph)
-final_schema_builder.create_schema('PublicationDelivery', None, [])
-final_schema_builder.create_tables_in_database(config.db_connection_url)
\ No newline at end of file
+    final_schema_builder = Final_Schema_Builder(schema_plan.simplified_schema_graph)
+    final_schema_builder.schema = schema_plan.schema
+    final_schema_builder.create_tables_in_database(config.db_connection_url, args.partitioned, args.ancestor_ids)
\ No newline at end of file
@@ -1,27 +1,81 @@
-from XML_Schema_Graph_Builder import XML_Schema_Graph_Builder
-from Simplified_Schema_Graph_Builder import Simplified_Schema_Graph_Builder
-from Final_Schema_Builder import Final_Schema_Builder 
-from XML_Handler import XML_Handler
-from NeTEx_File_Reader import NeTEx_File_Reader
-from Database_Handler import Database_Handler
+from Schema_Plan import Schema_Plan
+from NeTEx_Ingestor import NeTEx_Ingestor
+from NeTEx_Source import NeTEx_Source
+from Bulk_Load_Manager import Bulk_Load_Manager, staging_suffix
 import config
-import os
+import argparse
+import time
 
-xml_schema_graph_builder = XML_Schema_Graph_Builder()
-xml_schema_graph_builder.create_graph('xsd_netex')
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(description='Insert NeTEx files into the database')
+    parser.add_argument('netex_path', nargs='?', default='../norway_netex', help='directory, zip archive or (gzip or zstandard compressed) file with the NeTEx files')
+    parser.add_argument('--members', default='*', help='only ingest the files (or members of the zip archive) that match this glob pattern, example: --members "*_RUT_*"')
+    parser.add_argument('--stream', action='store_true', help='parse the files incrementally, so that the memory usage depends on the batch size and not on the file size')
+    parser.add_argument('--batch-size', type=int, default=50000, help='number of rows after which the streaming reader writes to the database')
+    parser.add_argument('--incremental', action='store_true', help='skip files that did not change since the last import and replace the rows of changed files')
+    parser.add_argument('--commit-size', type=int, default=1, help='number of files that are committed together, every file is still inserted completely or not at all')
+    parser.add_argument('--bulk-load', action='store_true', help='load into unlogged staging tables without indexes and replace the tables with them at the end')
+    parser.add_argument('--primary-keys', action='store_true', help='bulk load: create primary keys on the column id (fails if an element is part of multiple files)')
+    parser.add_argument('--foreign-keys', action='store_true', help='bulk load: create foreign keys on the column parent_id (needs --primary-keys)')
+    parser.add_argument('--index-workers', type=int, default=4, help='bulk load: number of indexes that are built in parallel')
+    parser.add_argument('--parquet', help='write the rows as parquet datasets (one directory per table) to this path instead of the database')
+    parser.add_argument('--pipeline-queue-size', type=int, help='parse, read and write concurrently, the stages are connected by queues with this size (backpressure)')
+    parser.add_argument('--keep-namespaces', action='store_true', help='match the xml elements with their namespaces instead of removing the namespaces after parsing (faster)')
+    parser.add_argument('--ancestor-ids', action='store_true', help='write the ids of all ancestor elements of every row to the column ancestor_ids (bulk load: with gin indexes)')
+    parser.add_argument('--workers', type=int, default=1, help='number of processes that ingest files in parallel')
+    parser.add_argument('--metrics-json', help='write the metrics of every file and stage as json report to this path')
+    parser.add_argument('--metrics-prometheus', help='write the metrics in the prometheus text format to this path')
+    parser.add_argument('--profile', choices=['cprofile', 'pyinstrument'], help='create a profile for every file')
+    parser.add_argument('--profile-path', default='.', help='directory for the profiles')
+    parser.add_argument('--tables', nargs='+', help='only use these tables and the tables that contain them, example: --tables StopPlace Quay')
+    args = parser.parse_args()
 
-simplified_schema_graph_builder = Simplified_Schema_Graph_Builder(xml_schema_graph_builder.graph)
-simplified_schema_graph_builder.create_graph('PublicationDelivery', 'PublicationDelivery')
+    if args.bulk_load and args.incremental:
+        parser.error('--bulk-load replaces all tables and can not be combined with --incremental')
+    if args.parquet != None and (args.bulk_load or args.incremental):
+        parser.error('--parquet can not be combined with --bulk-load or --incremental')
+    if args.commit_size > 1 and args.workers > 1:
+        parser.error('--commit-size can not be combined with --workers, every file is committed before it is reported')
+    if args.pipeline_queue_size != None and (args.workers > 1 or args.incremental or args.commit_size > 1):
+        parser.error('--pipeline-queue-size can not be combined with --workers, --incremental or --commit-size')
 
-final_schema_builder = Final_Schema_Builder(simplified_schema_graph_builder.graph)
-final_schema_builder.create_schema('PublicationDelivery', None, [])
+    schema_plan = Schema_Plan('xsd_netex', selected_table_names=args.tables).load()
 
-for file in os.listdir('../norway_netex'):
-    print(file)
-    root = XML_Handler().load(f'../norway_netex/{file}', True)
-    netex_file_reader = NeTEx_File_Reader(final_schema_builder.schema, simplified_schema_graph_builder.graph)
-    netex_file_reader.query_node(root, 'PublicationDelivery', None, None)
+    table_suffix = ''
+    if args.bulk_load:
+        bulk_load_manager = Bulk_Load_Manager(
+            config.db_connection_url, schema_plan.schema, schema_plan.dispatch_tables, args.primary_keys, args.foreign_keys, args.index_workers,
+            args.ancestor_ids
+        )
+        bulk_load_manager.prepare()
+        table_suffix = staging_suffix
 
-    database_handler = Database_Handler(config.db_connection_url)
-    for table_name, table_rows in netex_file_reader.results.items():
-        database_handler.insert(table_name, table_rows)
+    netex_ingestor = NeTEx_Ingestor(
+        schema_plan, config.db_connection_url, args.stream, args.batch_size, args.incremental, args.profile, args.profile_path, args.commit_size, table_suffix,
+        args.parquet, args.pipeline_queue_size, args.keep_namespaces, args.ancestor_ids
+    )
+
+    # the files are read directly from the archive or compressed files, without extracting them
+    netex_source = NeTEx_Source()
+    filenames = netex_source.get_filenames(args.netex_path, args.members)
+    for i, (filename, duration) in enumerate(netex_ingestor.ingest_files(filenames, args.workers)):
+        if duration == None:
+            print(f'[{i + 1}/{len(filenames)}] {netex_source.get_source_file(filename)} (unchanged)')
+        else:
+            print(f'[{i + 1}/{len(filenames)}] {netex_source.get_source_file(filename)} ({duration:.1f} s)')
+
+    # texts that couldn't be converted to the type of their column were stored as null (see XSD_Type_Converter)
+    for table_name, columns in netex_ingestor.metrics.report()['rejected_values'].items():
+        for column_name, count in columns.items():
+            print(f'{table_name}.{column_name}: {count} values could not be converted and were stored as null')
+
+    # only reached if all files were inserted, otherwise the existing tables stay unchanged
+    if args.bulk_load:
+        start = time.perf_counter()
+        bulk_load_manager.finish()
+        print(f'indexes built and tables replaced ({time.perf_counter() - start:.1f} s)')
+
+    if args.metrics_json != None:
+        netex_ingestor.metrics.write_json(args.metrics_json)
+    if args.metrics_prometheus != None:
+        netex_ingestor.metrics.write_prometheus(args.metrics_prometheus)
\ No newline at end of file
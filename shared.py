@@ -4,4 +4,37 @@ def camel_to_snake(str):
     return re.sub(r'(?<!^)(?=[A-Z])', '_', str).lower()
 
 def snake_to_camel(str):
-    return str.title().replace("_", "")
\ No newline at end of file
+    return str.title().replace("_", "")
+
+def run_iteratively(generator):
+    # runs a recursive function without using the call stack of python, so deep structures don't reach the recursion limit
+    # the function has to be a generator that yields a generator for every recursive call, the return value of the call is sent back
+    # example: 'child_result = yield self.create_graph_generator(child)' instead of 'child_result = self.create_graph(child)'
+    stack = [generator]
+    result = None
+
+    while len(stack) > 0:
+        try:
+            call = stack[-1].send(result)
+        except StopIteration as stop:
+            stack.pop()
+            result = stop.value
+        else:
+            stack.append(call)
+            result = None
+
+    return result
+
+# namespaces of the elements in NeTEx files, the elements can be looked up with and without them (see get_tags and XML_Handler)
+namespaces = ['http://www.netex.org.uk/netex', 'http://www.opengis.net/gml/3.2', 'http://www.siri.org.uk/siri']
+
+def get_tags(name):
+    # returns the tags of an element without and with the namespaces, example: 'Quay' -> ['Quay', '{http://www.netex.org.uk/netex}Quay', ...]
+    return [name] + [f'{{{namespace}}}{name}' for namespace in namespaces]
+
+def local_name(tag):
+    # example: '{http://www.netex.org.uk/netex}Quay' -> 'Quay'
+    # the tags of comments and processing instructions aren't strings and are returned unchanged
+    if not isinstance(tag, str):
+        return tag
+    return tag[tag.find('}') + 1:]
@@ -0,0 +1,5 @@
+import sys
+import os
+
+# the modules of the repository aren't a package, they are imported from the repository root like in the scripts
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
@@ -0,0 +1,32 @@
+from decimal import Decimal
+
+from Column_Store import Column_Store
+
+
+def test_values_of_different_types_are_not_mixed_up():
+    # True, 1 and Decimal('1.0') are equal, but have to keep their type
+    column_store = Column_Store(['a', 'b', 'c'])
+    column_store.append({'a': True})
+    column_store.append({'b': 1})
+    column_store.append({'c': Decimal('1.0')})
+
+    assert [type(value) for value in column_store.columns['a'][0:1] + column_store.columns['b'][1:2] + column_store.columns['c'][2:3]] == [bool, int, Decimal]
+
+
+def test_texts_are_stored_once():
+    column_store = Column_Store(['parent_id'])
+    column_store.append({'parent_id': ''.join(['RUT:ServiceJourney:', '1'])})
+    column_store.append({'parent_id': ''.join(['RUT:ServiceJourney:', '1'])})
+
+    assert column_store.columns['parent_id'][0] is column_store.columns['parent_id'][1]
+
+
+def test_get_values():
+    column_store = Column_Store(['id', 'attributes'])
+    column_store.append({'id': 'a', 'attributes': {'version': '1'}})
+    column_store.append({'id': 'b', 'order': '2'})
+
+    assert len(column_store) == 2
+    assert list(column_store.get_values(['id', 'attributes', 'order', 'missing'], 0, 2)) == [
+        ('a', '{"version":"1"}', None, None), ('b', None, '2', None)
+    ]
@@ -0,0 +1,83 @@
+import pytest
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('shapely')
+
+from Database_Handler import Database_Handler
+from Column_Store import Column_Store
+
+
+class Copy_Cursor:
+    # records the COPY commands and the other statements instead of sending them to a database
+    def __init__(self):
+        self.copies = []
+        self.statements = []
+
+    def copy_expert(self, query, buffer):
+        self.copies.append((query, buffer.read()))
+
+    def execute(self, query, parameters=None):
+        self.statements.append(' '.join(query.split()))
+
+
+class Connection:
+    def __init__(self, cursor):
+        self.copy_cursor = cursor
+
+    def cursor(self):
+        return self.copy_cursor
+
+    def commit(self):
+        pass
+
+
+def create_database_handler():
+    # the engine doesn't connect before it's used, copy_rows only needs the cursor
+    return Database_Handler('sqlite://', schema={'Quay': {'Id': {}, 'Name': {}, 'SourceFile': {}}})
+
+
+def test_copy_rows_with_source_file():
+    cursor = Copy_Cursor()
+    size = create_database_handler().copy_rows(cursor, 'quay', ['id', 'name'], [{'id': 'NSR:Quay:1', 'name': 'A'}, {'id': 'NSR:Quay:2'}], 'file.xml')
+
+    query, text = cursor.copies[0]
+    assert query == 'COPY quay (id,name,source_file) FROM STDIN'
+    # every row has exactly one field per column
+    assert text == 'NSR:Quay:1\tA\tfile.xml\nNSR:Quay:2\t\\N\tfile.xml\n'
+    assert size == len(text)
+
+
+def test_copy_rows_without_source_file():
+    cursor = Copy_Cursor()
+    create_database_handler().copy_rows(cursor, 'quay', ['id', 'name'], [{'id': 'NSR:Quay:1', 'name': 'A\tB'}])
+
+    assert cursor.copies == [('COPY quay (id,name) FROM STDIN', 'NSR:Quay:1\tA\\tB\n')]
+
+
+def test_copy_rows_of_column_store_with_source_file():
+    table_rows = Column_Store(['id', 'name'])
+    table_rows.append({'id': 'NSR:Quay:1', 'name': "Bjørn's \"stop\""})
+
+    cursor = Copy_Cursor()
+    create_database_handler().copy_rows(cursor, 'quay', ['id', 'name'], table_rows, 'file\\1.xml')
+
+    assert cursor.copies == [('COPY quay (id,name,source_file) FROM STDIN', 'NSR:Quay:1\tBjørn\'s "stop"\tfile\\\\1.xml\n')]
+
+
+def test_upsert_only_touches_the_partition_of_the_file():
+    database_handler = create_database_handler()
+    cursor = Copy_Cursor()
+    database_handler.connection = Connection(cursor)
+    database_handler.partitioned_tables = {'quay'}
+    # the partition was created before the file transaction (see create_partitions)
+    database_handler.created_partitions.add(('quay', 'file.xml'))
+    partition_name = database_handler.get_partition_name('quay', 'file.xml')
+
+    with database_handler.file_transaction():
+        database_handler.insert('quay', [{'id': 'NSR:Quay:1', 'name': 'A'}], 'file.xml', upsert=True)
+
+    assert cursor.copies[0][0] == 'COPY quay__upsert (id,name,source_file) FROM STDIN'
+    upsert_statement = [statement for statement in cursor.statements if statement.startswith('DELETE')][0]
+    assert upsert_statement.startswith(f'DELETE FROM {partition_name} USING quay__upsert')
+    assert f'INSERT INTO {partition_name} (id,name,source_file)' in upsert_statement
+    assert 'FROM quay ' not in upsert_statement and 'INTO quay ' not in upsert_statement
@@ -0,0 +1,64 @@
+import pytest
+
+pytest.importorskip('pyproj')
+etree = pytest.importorskip('lxml.etree')
+
+import shapely
+
+from Geometry_Handler import Geometry_Handler
+
+
+def to_element(gml_string):
+    return etree.fromstring(gml_string.replace('<gml:Polygon', '<gml:Polygon xmlns:gml="http://www.opengis.net/gml/3.2"', 1).replace(
+        '<gml:LineString', '<gml:LineString xmlns:gml="http://www.opengis.net/gml/3.2"', 1
+    ))
+
+
+def test_axis_order():
+    geometry_handler = Geometry_Handler()
+
+    # the short form is always in x/y order, the urn form in the axis order of EPSG:4326 (latitude/longitude)
+    xy = geometry_handler.gml_to_shapely(to_element('<gml:LineString srsName="EPSG:4326"><gml:posList>10 59 11 60</gml:posList></gml:LineString>'))
+    yx = geometry_handler.gml_to_shapely(to_element('<gml:LineString srsName="urn:ogc:def:crs:EPSG::4326"><gml:posList>59 10 60 11</gml:posList></gml:LineString>'))
+
+    assert list(xy.coords) == [(10, 59), (11, 60)]
+    assert list(yx.coords) == [(10, 59), (11, 60)]
+
+
+def test_srs_dimension_3():
+    geometry_handler = Geometry_Handler()
+
+    geom = geometry_handler.gml_to_shapely(to_element(
+        '<gml:LineString srsName="EPSG:4326" srsDimension="3"><gml:posList>10 59 100 11 60 200</gml:posList></gml:LineString>'
+    ))
+    pos_list_geom = geometry_handler.gml_to_shapely(to_element(
+        '<gml:LineString srsName="EPSG:4326"><gml:posList srsDimension="3">10 59 100 11 60 200</gml:posList></gml:LineString>'
+    ))
+
+    assert list(geom.coords) == [(10, 59), (11, 60)]
+    assert list(pos_list_geom.coords) == [(10, 59), (11, 60)]
+
+
+def test_interior_rings():
+    geometry_handler = Geometry_Handler()
+
+    geom = geometry_handler.gml_to_shapely(to_element('''<gml:Polygon srsName="EPSG:25833">
+        <gml:exterior><gml:LinearRing><gml:posList>0 0 10 0 10 10 0 10 0 0</gml:posList></gml:LinearRing></gml:exterior>
+        <gml:interior><gml:LinearRing><gml:pos>2 2</gml:pos><gml:pos>4 2</gml:pos><gml:pos>4 4</gml:pos><gml:pos>2 2</gml:pos></gml:LinearRing></gml:interior>
+        <gml:interior><gml:LinearRing><gml:posList>6 6 8 6 8 8 6 6</gml:posList></gml:LinearRing></gml:interior>
+    </gml:Polygon>'''))
+
+    assert len(geom.interiors) == 2
+    assert list(geom.interiors[0].coords) == [(2, 2), (4, 2), (4, 4), (2, 2)]
+    assert geom.area == 100 - 2 - 2
+    assert shapely.get_srid(geom) == 25833
+
+
+@pytest.mark.parametrize('pos_list', ['10 59 11', '10 59 x 60', '10,59 11,60'])
+def test_malformed_coordinates(pos_list):
+    geometry_handler = Geometry_Handler()
+
+    assert geometry_handler.gml_to_shapely(to_element(f'<gml:LineString><gml:posList>{pos_list}</gml:posList></gml:LineString>')) == None
+    assert geometry_handler.gml_to_shapely(to_element(
+        f'<gml:Polygon><gml:exterior><gml:LinearRing><gml:posList>{pos_list}</gml:posList></gml:LinearRing></gml:exterior></gml:Polygon>'
+    )) == None
@@ -0,0 +1,44 @@
+import threading
+import time
+
+from Ingestion_Metrics import Ingestion_Metrics
+
+
+def busy_loop(seconds):
+    end = time.perf_counter() + seconds
+    while time.perf_counter() < end:
+        pass
+
+
+def test_stage_cpu_time_of_concurrent_threads():
+    metrics = Ingestion_Metrics()
+    load_metrics = Ingestion_Metrics()
+
+    def load():
+        load_metrics.start_file('a.xml')
+        with load_metrics.stage('copy'):
+            busy_loop(0.3)
+        metrics.merge_file(load_metrics.end_file())
+
+    metrics.start_file('a.xml')
+    thread = threading.Thread(target=load)
+    with metrics.stage('query_node'):
+        thread.start()
+        # the cpu time of the other thread isn't counted for this stage
+        thread.join()
+    record = metrics.end_file()
+
+    assert record['stages']['query_node']['cpu_seconds'] < 0.1
+    assert record['stages']['copy']['cpu_seconds'] > 0.2
+    # the cpu time of the file contains the merged cpu time of the other thread
+    assert record['cpu_seconds'] > 0.2
+
+
+def test_rejected_values_in_report():
+    metrics = Ingestion_Metrics()
+    for source_file in ['a.xml', 'b.xml']:
+        metrics.start_file(source_file)
+        metrics.add_rejected_value('quay', 'altitude')
+        metrics.end_file()
+
+    assert metrics.report()['rejected_values'] == {'quay': {'altitude': 2}}
@@ -0,0 +1,221 @@
+import contextlib
+import decimal
+import os
+
+import pytest
+
+pytest.importorskip('networkx')
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('geoalchemy2')
+pytest.importorskip('pyproj')
+etree = pytest.importorskip('lxml.etree')
+
+from Schema_Plan import Schema_Plan
+from Final_Schema_Builder import Final_Schema_Builder
+from NeTEx_File_Reader import NeTEx_File_Reader
+from NeTEx_Stream_Reader import NeTEx_Stream_Reader
+from XML_Handler import XML_Handler
+from Output_Sink import Output_Sink
+from Column_Store import Column_Store
+
+# tiny subset of the NeTEx xsd files, see tests/xsd_netex
+xsd_netex_path = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'xsd_netex')
+
+netex_file = '''<?xml version="1.0" encoding="UTF-8"?>
+<PublicationDelivery xmlns="http://www.netex.org.uk/netex" version="1.15:NO-NeTEx-stops:1.4">
+    <PublicationTimestamp>2024-05-01T10:00:00</PublicationTimestamp>
+    <ParticipantRef>RB</ParticipantRef>
+    <dataObjects>
+        <SiteFrame id="NSR:SiteFrame:1" version="1">
+            <Name>Stops</Name>
+            <stopPlaces>
+                <StopPlace id="NSR:StopPlace:1" version="2">
+                    <Name>Oslo S</Name>
+                    <PrivateCode><Value>OSL</Value></PrivateCode>
+                    <Centroid><Location><Longitude>10.75</Longitude><Latitude>59.91</Latitude></Location></Centroid>
+                    <quays>
+                        <Quay id="NSR:Quay:1" version="1"><Name>Track 1</Name><PublicCode>1</PublicCode><Altitude>3.5</Altitude></Quay>
+                        <Quay id="NSR:Quay:2" version="1"><Name>Track 2</Name></Quay>
+                    </quays>
+                </StopPlace>
+            </stopPlaces>
+        </SiteFrame>
+        <ServiceFrame id="RUT:ServiceFrame:1" version="1">
+            <lines>
+                <Line id="RUT:Line:1" version="3"><Name>L1</Name><TransportMode>bus</TransportMode></Line>
+            </lines>
+        </ServiceFrame>
+    </dataObjects>
+</PublicationDelivery>
+'''
+
+
+class Collecting_Sink(Output_Sink):
+    # collects the rows of the stream reader instead of writing them
+    def __init__(self):
+        self.results = {}
+
+    def insert(self, table_name, table_rows, source_file=None, upsert=False):
+        self.results.setdefault(table_name, []).extend(to_dicts(table_rows))
+
+    @contextlib.contextmanager
+    def file_transaction(self):
+        yield
+
+
+def to_dicts(table_rows):
+    if isinstance(table_rows, Column_Store):
+        column_names = list(table_rows.columns.keys())
+        return [dict(zip(column_names, values)) for values in table_rows.get_values(column_names, 0, len(table_rows))]
+    return list(table_rows)
+
+
+def get_rows(results):
+    # the rows of every table sorted by id, the generated id of 'PublicationDelivery' (it has no id attribute) is replaced
+    rows = {table_name: sorted(to_dicts(table_rows), key=lambda row: row['id']) for table_name, table_rows in results.items() if len(table_rows) > 0}
+    generated_id = rows['publication_delivery'][0]['id']
+
+    for table_rows in rows.values():
+        for row in table_rows:
+            for column_name in ['id', 'parent_id']:
+                if row.get(column_name) == generated_id:
+                    row[column_name] = 'generated'
+            if row.get('ancestor_ids') != None:
+                row['ancestor_ids'] = ['generated' if ancestor_id == generated_id else ancestor_id for ancestor_id in row['ancestor_ids']]
+
+    return rows
+
+
+@pytest.fixture(scope='module')
+def schema_plans(tmp_path_factory):
+    # the schema plans are built once and loaded from their cache files afterwards
+    cache_path = tmp_path_factory.mktemp('schema_plans')
+    for _ in range(2):
+        schema_plans = {
+            'all': Schema_Plan(xsd_netex_path, cache_path=str(cache_path / 'schema_plan.pickle'), workers=1).load(),
+            'quay': Schema_Plan(xsd_netex_path, cache_path=str(cache_path / 'schema_plan_quay.pickle'), workers=1, selected_table_names=['Quay']).load()
+        }
+    return schema_plans
+
+
+@pytest.fixture(scope='module')
+def filename(tmp_path_factory):
+    filename = tmp_path_factory.mktemp('netex') / 'netex_file.xml'
+    filename.write_text(netex_file)
+    return str(filename)
+
+
+def read_file(schema_plan, filename, keep_namespaces=False, ancestor_ids=False):
+    root = XML_Handler().load(filename, True, remove_namespaces=not keep_namespaces)
+    netex_file_reader = NeTEx_File_Reader(schema_plan.schema, schema_plan.simplified_schema_graph, schema_plan.dispatch_tables, ancestor_ids=ancestor_ids)
+    netex_file_reader.query_node(root, 'PublicationDelivery', None, None)
+    netex_file_reader.reproject_geometries()
+    return get_rows(netex_file_reader.results)
+
+
+def stream_file(schema_plan, filename, keep_namespaces=False, ancestor_ids=False, batch_size=2):
+    output_sink = Collecting_Sink()
+    netex_stream_reader = NeTEx_Stream_Reader(
+        schema_plan.schema, schema_plan.simplified_schema_graph, output_sink, batch_size, schema_plan.dispatch_tables, 'netex_file.xml',
+        ancestor_ids=ancestor_ids
+    )
+    netex_stream_reader.read(filename, remove_namespaces=not keep_namespaces)
+    return get_rows(output_sink.results)
+
+
+def test_dispatch_tables(schema_plans):
+    dispatch_tables = schema_plans['all'].dispatch_tables
+
+    # the tags are looked up with and without namespace
+    column_name, is_list, child_node_id, is_table = dispatch_tables['Quay']['PublicCode']
+    assert (column_name, is_table) == ('public_code', False)
+    assert dispatch_tables['Quay']['{http://www.netex.org.uk/netex}PublicCode'] == dispatch_tables['Quay']['PublicCode']
+
+    # 'Quay' is the child of a child element of 'StopPlace' and belongs to its own table
+    quays_node_id = dispatch_tables['StopPlace']['quays'][2]
+    assert dispatch_tables[quays_node_id]['Quay'][2:] == ('Quay', True)
+
+
+def test_table_selection(schema_plans):
+    simplified_schema_graph = schema_plans['all'].simplified_schema_graph
+    final_schema_builder = Final_Schema_Builder(simplified_schema_graph)
+
+    assert final_schema_builder.get_child_tables('PublicationDelivery') == {'SiteFrame', 'ServiceFrame'}
+    assert final_schema_builder.get_child_tables('StopPlace') == {'Quay'}
+    assert final_schema_builder.get_needed_table_names(['Quay']) == {'Quay', 'StopPlace', 'SiteFrame', 'PublicationDelivery'}
+    assert set(schema_plans['quay'].schema.keys()) == {'Quay', 'StopPlace', 'SiteFrame', 'PublicationDelivery'}
+
+    with pytest.raises(Exception, match='unknown table'):
+        final_schema_builder.get_needed_table_names(['Quays'])
+
+
+def test_file_reader_rows(schema_plans, filename):
+    rows = read_file(schema_plans['all'], filename)
+
+    assert sorted(rows.keys()) == ['line', 'publication_delivery', 'quay', 'service_frame', 'site_frame', 'stop_place']
+    assert rows['quay'][0] == {
+        'name': 'Track 1', 'public_code': '1', 'altitude': decimal.Decimal('3.5'), 'parent_id': 'NSR:StopPlace:1',
+        'id': 'NSR:Quay:1', 'version': '1', 'attributes': {'version': '1'}
+    }
+    assert rows['stop_place'][0]['private_code'] == [{'value': 'OSL'}]
+    assert list(rows['stop_place'][0]['geom'].coords) == [(10.75, 59.91)]
+    assert rows['site_frame'][0]['parent_id'] == 'generated'
+
+
+def test_rejected_values_are_counted(schema_plans, tmp_path):
+    filename = tmp_path / 'netex_file.xml'
+    filename.write_text(netex_file.replace('<Altitude>3.5</Altitude>', '<Altitude>3,5 m</Altitude>'))
+
+    schema_plan = schema_plans['all']
+    netex_file_reader = NeTEx_File_Reader(schema_plan.schema, schema_plan.simplified_schema_graph, schema_plan.dispatch_tables)
+    netex_file_reader.query_node(XML_Handler().load(str(filename), True), 'PublicationDelivery', None, None)
+
+    assert netex_file_reader.results['quay'][0]['altitude'] == None
+    assert netex_file_reader.metrics.current_file['rejected_values'] == {'quay': {'altitude': 1}}
+
+
+@pytest.mark.parametrize('keep_namespaces', [False, True])
+@pytest.mark.parametrize('schema_plan_name', ['all', 'quay'])
+def test_file_reader_and_stream_reader_create_the_same_rows(schema_plans, filename, keep_namespaces, schema_plan_name):
+    schema_plan = schema_plans[schema_plan_name]
+    # the rows without namespaces and without a table selection are the reference
+    reference_rows = read_file(schema_plans['all'], filename)
+    if schema_plan_name == 'quay':
+        reference_rows = {table_name: reference_rows[table_name] for table_name in ['publication_delivery', 'site_frame', 'stop_place', 'quay']}
+
+    assert read_file(schema_plan, filename, keep_namespaces) == reference_rows
+    assert stream_file(schema_plan, filename, keep_namespaces) == reference_rows
+
+
+@pytest.mark.parametrize('keep_namespaces', [False, True])
+def test_ancestor_ids(schema_plans, filename, keep_namespaces):
+    rows = read_file(schema_plans['all'], filename, keep_namespaces, ancestor_ids=True)
+
+    assert [row['ancestor_ids'] for row in rows['quay']] == [['generated', 'NSR:SiteFrame:1', 'NSR:StopPlace:1']] * 2
+    assert rows['line'][0]['ancestor_ids'] == ['generated', 'RUT:ServiceFrame:1']
+    assert 'ancestor_ids' not in rows['publication_delivery'][0]
+    assert stream_file(schema_plans['all'], filename, keep_namespaces, ancestor_ids=True) == rows
+
+
+def test_deeply_nested_elements():
+    # element 'Nested' inside of itself, deeper than the recursion limit of python
+    schema = {'PublicationDelivery': {'id': {}, 'nested': {}}}
+    dispatch_tables = {
+        'PublicationDelivery': {'Nested': ('nested', False, 'Nested', False)},
+        'Nested': {'Nested': ('nested', False, 'Nested', False), 'Value': ('value', False, 'Value', False)},
+        'Value': {}
+    }
+
+    root = etree.Element('PublicationDelivery')
+    element = etree.SubElement(root, 'Nested')
+    for _ in range(5000):
+        element = etree.SubElement(element, 'Nested')
+    etree.SubElement(element, 'Value').text = 'value'
+
+    netex_file_reader = NeTEx_File_Reader(schema, None, dispatch_tables)
+    netex_file_reader.query_node(root, 'PublicationDelivery', None, None)
+
+    nested = netex_file_reader.results['publication_delivery'][0]['nested']
+    for _ in range(5000):
+        nested = nested['nested']
+    assert nested == {'value': 'value'}
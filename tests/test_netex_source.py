@@ -0,0 +1,32 @@
+import zipfile
+import gzip
+
+from NeTEx_Source import NeTEx_Source
+
+
+def test_source_files_of_zip_members(tmp_path):
+    archive_path = str(tmp_path / 'netex.zip')
+    with zipfile.ZipFile(archive_path, 'w') as archive:
+        archive.writestr('_RUT_shared_data.xml', '<PublicationDelivery/>')
+        # members with the same name in different directories
+        archive.writestr('rut/lines.xml', '<PublicationDelivery/>')
+        archive.writestr('atb/lines.xml', '<PublicationDelivery/>')
+
+    netex_source = NeTEx_Source()
+    filenames = netex_source.get_filenames(archive_path)
+
+    assert [netex_source.get_source_file(filename) for filename in filenames] == ['_RUT_shared_data.xml', 'atb/lines.xml', 'rut/lines.xml']
+    assert netex_source.get_filenames(archive_path, 'rut/*') == [f'{archive_path}!rut/lines.xml']
+
+
+def test_source_files_of_files(tmp_path):
+    (tmp_path / 'netex').mkdir()
+    (tmp_path / 'netex' / 'lines.xml').write_text('<PublicationDelivery/>')
+    with gzip.open(tmp_path / 'netex' / 'stops.xml.gz', 'wt') as file:
+        file.write('<PublicationDelivery/>')
+
+    netex_source = NeTEx_Source()
+    filenames = netex_source.get_filenames(str(tmp_path / 'netex'))
+
+    # the directories and the compression extension aren't part of the source file
+    assert [netex_source.get_source_file(filename) for filename in filenames] == ['lines.xml', 'stops.xml']
@@ -0,0 +1,59 @@
+import pytest
+import os
+
+pytest.importorskip('sqlalchemy')
+pytest.importorskip('geoalchemy2')
+pq = pytest.importorskip('pyarrow.parquet')
+
+from sqlalchemy import String
+
+from Parquet_Sink import Parquet_Sink
+
+schema = {'Quay': {'Id': {'column_type': String}, 'Name': {'column_type': String}, 'SourceFile': {'column_type': String}}}
+
+
+def test_rows_of_failed_file_are_not_written(tmp_path):
+    parquet_sink = Parquet_Sink(str(tmp_path), schema, row_group_size=10)
+
+    with parquet_sink.file_transaction():
+        parquet_sink.insert('quay', [{'id': 'Q:1', 'name': 'A'}], source_file='a.xml')
+
+    with pytest.raises(ValueError):
+        with parquet_sink.file_transaction():
+            parquet_sink.insert('quay', [{'id': 'Q:2', 'name': 'B'}], source_file='b.xml')
+            raise ValueError('file failed')
+
+    with parquet_sink.file_transaction():
+        parquet_sink.insert('quay', [{'id': 'Q:3', 'name': 'C'}], source_file='c.xml')
+    parquet_sink.close()
+
+    table = pq.read_table(str(tmp_path / 'quay'))
+    assert table.column('id').to_pylist() == ['Q:1', 'Q:3']
+    assert table.column('source_file').to_pylist() == ['a.xml', 'c.xml']
+
+
+def test_big_files_are_written_before_their_end(tmp_path):
+    parquet_sink = Parquet_Sink(str(tmp_path), schema, row_group_size=2)
+
+    with pytest.raises(ValueError):
+        with parquet_sink.file_transaction():
+            for i in range(5):
+                parquet_sink.insert('quay', [{'id': f'Q:{i}'}], source_file='a.xml')
+            # the full row groups are written to a temporary part, only the last row is kept in memory
+            assert parquet_sink.file_row_counts['quay'] == 1
+            assert len(os.listdir(tmp_path / 'quay')) == 1
+            raise ValueError('file failed')
+
+    # the temporary part of the failed file is deleted
+    assert os.listdir(tmp_path / 'quay') == []
+
+    with parquet_sink.file_transaction():
+        for i in range(5):
+            parquet_sink.insert('quay', [{'id': f'Q:{i}'}], source_file='b.xml')
+    with parquet_sink.file_transaction():
+        parquet_sink.insert('quay', [{'id': 'Q:5'}], source_file='c.xml')
+    parquet_sink.close()
+
+    table = pq.read_table(str(tmp_path / 'quay'))
+    assert sorted(table.column('id').to_pylist()) == [f'Q:{i}' for i in range(6)]
+    assert all(not filename.startswith('.') for filename in os.listdir(tmp_path / 'quay'))
@@ -0,0 +1,93 @@
+import contextlib
+import threading
+
+import pytest
+
+from Queue_Sink import Queue_Sink
+from Output_Sink import Output_Sink
+from Ingestion_Metrics import Ingestion_Metrics
+
+
+class Recording_Sink(Output_Sink):
+    # records the inserts and transactions, the inserts block until insert_allowed is set
+    def __init__(self, fail_on_table=None):
+        self.metrics = Ingestion_Metrics()
+        self.events = []
+        self.fail_on_table = fail_on_table
+        self.insert_allowed = threading.Event()
+        self.insert_allowed.set()
+
+    def insert(self, table_name, table_rows, source_file=None, upsert=False):
+        self.insert_allowed.wait()
+        if table_name == self.fail_on_table:
+            raise ValueError(table_name)
+        self.events.append(('insert', table_name, source_file))
+        self.metrics.add_table_rows(table_name, len(table_rows), 0)
+
+    @contextlib.contextmanager
+    def file_transaction(self):
+        self.events.append(('begin',))
+        try:
+            yield
+        except BaseException:
+            self.events.append(('rollback',))
+            raise
+        self.events.append(('commit',))
+
+
+def insert_file(queue_sink, metrics, source_file, fail=False):
+    metrics.start_file(source_file)
+    try:
+        with queue_sink.file_transaction():
+            queue_sink.insert('quay', [{'id': '1'}], source_file)
+            if fail:
+                raise ValueError(source_file)
+    finally:
+        metrics.end_file()
+
+
+def test_files_are_committed_after_their_inserts():
+    metrics = Ingestion_Metrics()
+    output_sink = Recording_Sink()
+    queue_sink = Queue_Sink(output_sink, 1, metrics)
+
+    insert_file(queue_sink, metrics, 'a.xml')
+    with pytest.raises(ValueError):
+        insert_file(queue_sink, metrics, 'b.xml', fail=True)
+    queue_sink.close()
+
+    assert output_sink.events == [
+        ('begin',), ('insert', 'quay', 'a.xml'), ('commit',), ('begin',), ('insert', 'quay', 'b.xml'), ('rollback',)
+    ]
+    # only the committed file is reported
+    assert len(queue_sink.get_committed_files()) == 1
+    # the rows written by the load stage are part of the metrics of their file
+    assert [(record['source_file'], record['tables']['quay']['rows']) for record in metrics.files] == [('a.xml', 1), ('b.xml', 1)]
+
+
+def test_file_is_only_committed_after_the_load_stage_wrote_it():
+    metrics = Ingestion_Metrics()
+    output_sink = Recording_Sink()
+    output_sink.insert_allowed.clear()
+    queue_sink = Queue_Sink(output_sink, 4, metrics)
+
+    insert_file(queue_sink, metrics, 'a.xml')
+    # file_transaction returned, but the load stage didn't write the rows yet
+    assert queue_sink.get_committed_files() == []
+
+    output_sink.insert_allowed.set()
+    queue_sink.close()
+    assert len(queue_sink.get_committed_files()) == 1
+
+
+def test_exception_of_the_load_stage_is_raised_in_the_caller():
+    metrics = Ingestion_Metrics()
+    output_sink = Recording_Sink(fail_on_table='quay')
+    queue_sink = Queue_Sink(output_sink, 1, metrics)
+
+    insert_file(queue_sink, metrics, 'a.xml')
+    with pytest.raises(ValueError):
+        queue_sink.close()
+
+    assert queue_sink.get_committed_files() == []
+    assert output_sink.events == [('begin',), ('rollback',)]